@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 import uuid
@@ -20,8 +20,8 @@ class VoiceReplaceResponse(BaseModel):
     message: Optional[str] = None
     error: Optional[str] = None
 
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "file_id": "replace_12345",
                 "name": "示例视频.mp4",
@@ -29,6 +29,7 @@ class VoiceReplaceResponse(BaseModel):
                 "message": "媒体文件上传成功"
             }
         }
+    )
 
 class SubtitleResponse(BaseModel):
     task_id: str
@@ -49,8 +50,8 @@ class VoiceReplaceStatus(BaseModel):
     output_filename: Optional[str] = None
     error: Optional[str] = None
 
-    class Config:
-        schema_extra = {
+    model_config = ConfigDict(
+        json_schema_extra={
             "example": {
                 "task_id": "replace_task_12345",
                 "name": "示例视频.mp4",
@@ -63,6 +64,7 @@ class VoiceReplaceStatus(BaseModel):
                 "output_filename": "替换后_示例视频.mp4"
             }
         }
+    )
 
 class MediaFileDB(BaseModel):
     file_id: str = Field(default_factory=lambda: f"media_{uuid.uuid4().hex[:12]}")
@@ -72,6 +74,7 @@ class MediaFileDB(BaseModel):
     content_type: str
     file_size: int
     duration: Optional[float] = None
+    vad_segments: Optional[List[List[float]]] = None  # VAD 结果缓存 [[start, end], ...]
     is_video: bool
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: Optional[datetime] = None
@@ -57,5 +57,6 @@ class TTSTaskDB(BaseModel):
     created_at: datetime = Field(default_factory=datetime.now)
     updated_at: Optional[datetime] = None
     file_path: Optional[str] = None
+    file_verified: bool = False  # 完成时已确认输出文件落盘
     error: Optional[str] = None
     duration: Optional[float] = None
\ No newline at end of file
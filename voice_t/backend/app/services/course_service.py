@@ -1,6 +1,7 @@
 import os
 import json
 import asyncio
+import itertools
 import time
 import shutil
 import re
@@ -9,15 +10,41 @@ from datetime import datetime
 from typing import Dict, Any, Optional, List
 from fastapi import UploadFile, BackgroundTasks
 from app.models.course import CoursewareDB, CoursewareTaskDB, CoursewareTextExtraction, CoursewareTaskStatus, SlideContent
-from app.services.tts_service import synthesize_speech, get_tts_task_status, get_tts_task_result
+from app.services.paddlespeech_tts import create_tts_task, get_tts_task_status, get_tts_task_result, get_tts_event
 from app.core.config import settings
+from app.utils.persistence import DebouncedFlusher
+
+# orjson 序列化比标准库 json 快数倍，且原生支持 datetime，不可用时退回标准库
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
 # 模拟数据库存储
 COURSEWARE_DB = []
+# file_id -> 课件记录索引，O(1) 查找
+COURSEWARE_INDEX: Dict[str, CoursewareDB] = {}
 COURSEWARE_TASKS_DB = []
+# task_id -> 任务记录索引，O(1) 查找
+COURSEWARE_TASKS_INDEX: Dict[str, CoursewareTaskDB] = {}
 COURSEWARE_FILE = os.path.join(settings.UPLOAD_DIR, "courseware.json")
 COURSEWARE_TASKS_FILE = os.path.join(settings.UPLOAD_DIR, "courseware_tasks.json")
 
+# 进程内单调递增计数器：时间戳+hash 后缀在并发上传时会碰撞，
+# 且 hash() 按进程随机化，不能作为稳定键
+_ID_COUNTER = itertools.count()
+
+# 分句正则预编译，省去每次分段时的模式查找
+_SENT_SPLIT_RE = re.compile(r'(?<=[。！？.!?])')
+
+# 保存去抖：逐页进度更新只置脏标志，由后台协程在合并窗口后统一落盘，
+# 避免每张幻灯片都全量序列化一次任务库
+_tasks_flusher = DebouncedFlusher(lambda: save_courseware_tasks_db(), interval=1.0)
+
+def mark_courseware_tasks_dirty():
+    _tasks_flusher.mark()
+
 # 初始化函数
 async def init_course_service():
     global COURSEWARE_DB, COURSEWARE_TASKS_DB
@@ -26,35 +53,55 @@ async def init_course_service():
     
     if os.path.exists(COURSEWARE_FILE):
         try:
-            with open(COURSEWARE_FILE, 'r') as f:
-                data = json.load(f)
+            with open(COURSEWARE_FILE, 'rb') as f:
+                data = orjson.loads(f.read()) if ORJSON_AVAILABLE else json.load(f)
                 COURSEWARE_DB = [CoursewareDB(**item) for item in data]
+                COURSEWARE_INDEX.clear()
+                COURSEWARE_INDEX.update((cw.file_id, cw) for cw in COURSEWARE_DB)
         except Exception as e:
             print(f"初始化课件服务失败: {e}")
     
     if os.path.exists(COURSEWARE_TASKS_FILE):
         try:
-            with open(COURSEWARE_TASKS_FILE, 'r') as f:
-                data = json.load(f)
+            with open(COURSEWARE_TASKS_FILE, 'rb') as f:
+                data = orjson.loads(f.read()) if ORJSON_AVAILABLE else json.load(f)
                 COURSEWARE_TASKS_DB = [CoursewareTaskDB(**item) for item in data]
+                COURSEWARE_TASKS_INDEX.clear()
+                COURSEWARE_TASKS_INDEX.update(
+                    (t.task_id, t) for t in COURSEWARE_TASKS_DB
+                )
         except Exception as e:
             print(f"初始化课件任务服务失败: {e}")
 
-# 保存到文件
+    # 启动保存去抖协程
+    _tasks_flusher.start()
+
+# 保存到文件：序列化在协程内完成，磁盘写放到线程池，
+# 避免同步 I/O 阻塞事件循环
+def _write_json_sync(path: str, payload: bytes):
+    with open(path, 'wb') as f:
+        f.write(payload)
+
+def _dump_records(records) -> bytes:
+    # model_dump(mode='json') 直接产出 JSON 原生类型，
+    # 不再靠 default=str 逐个兜底 datetime
+    data = [item.model_dump(mode='json') for item in records]
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data)
+    return json.dumps(data).encode('utf-8')
+
 async def save_courseware_db():
-    with open(COURSEWARE_FILE, 'w') as f:
-        data = [item.dict() for item in COURSEWARE_DB]
-        json.dump(data, f, default=str)
+    await asyncio.to_thread(_write_json_sync, COURSEWARE_FILE,
+                            _dump_records(COURSEWARE_DB))
 
 async def save_courseware_tasks_db():
-    with open(COURSEWARE_TASKS_FILE, 'w') as f:
-        data = [item.dict() for item in COURSEWARE_TASKS_DB]
-        json.dump(data, f, default=str)
+    await asyncio.to_thread(_write_json_sync, COURSEWARE_TASKS_FILE,
+                            _dump_records(COURSEWARE_TASKS_DB))
 
 # 上传课件
 async def upload_courseware(file: UploadFile, name: str) -> str:
     # 生成唯一文件ID
-    file_id = f"course_{int(time.time())}_{hash(file.filename) % 10000:04d}"
+    file_id = f"course_{int(time.time())}_{next(_ID_COUNTER):06d}"
     
     # 创建存储目录
     courseware_dir = os.path.join(settings.UPLOAD_DIR, "courseware")
@@ -63,14 +110,13 @@ async def upload_courseware(file: UploadFile, name: str) -> str:
     # 保存文件
     file_path = os.path.join(courseware_dir, f"{file_id}_{file.filename}")
     
-    # 获取文件大小
-    file.file.seek(0, 2)  # 移到文件末尾
-    file_size = file.file.tell()  # 获取位置（即文件大小）
-    file.file.seek(0)  # 回到文件开始
-    
-    # 写入文件
+    # 分块异步读取并写入，避免同步整文件拷贝阻塞事件循环；
+    # 边写边计数文件大小，省去 seek/tell 往返
+    file_size = 0
     with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+        while chunk := await file.read(1 << 20):
+            buffer.write(chunk)
+            file_size += len(chunk)
     
     # 创建记录
     courseware = CoursewareDB(
@@ -85,6 +131,7 @@ async def upload_courseware(file: UploadFile, name: str) -> str:
     
     # 添加到"数据库"
     COURSEWARE_DB.append(courseware)
+    COURSEWARE_INDEX[file_id] = courseware
     await save_courseware_db()
     
     return file_id
@@ -220,12 +267,7 @@ def extract_text_from_ppt(file_path):
 # 提取课件文本
 async def extract_text(file_id: str) -> Optional[CoursewareTextExtraction]:
     # 查找课件
-    courseware = None
-    for cw in COURSEWARE_DB:
-        if cw.file_id == file_id:
-            courseware = cw
-            break
-    
+    courseware = COURSEWARE_INDEX.get(file_id)
     if not courseware:
         return None
     
@@ -244,12 +286,9 @@ async def extract_text(file_id: str) -> Optional[CoursewareTextExtraction]:
         slides_count, extracted_text = extract_text_from_ppt(courseware.file_path)
         
         # 更新课件记录
-        for i, cw in enumerate(COURSEWARE_DB):
-            if cw.file_id == file_id:
-                COURSEWARE_DB[i].slides_count = slides_count
-                COURSEWARE_DB[i].extracted_text = extracted_text
-                COURSEWARE_DB[i].updated_at = datetime.now()
-                break
+        courseware.slides_count = slides_count
+        courseware.extracted_text = extracted_text
+        courseware.updated_at = datetime.now()
         
         await save_courseware_db()
         
@@ -268,7 +307,7 @@ async def extract_text(file_id: str) -> Optional[CoursewareTextExtraction]:
 def split_text_into_chunks(text, max_length=500):
     """将长文本分成适合TTS处理的小段"""
     # 按句子分割
-    sentences = re.split(r'(?<=[。！？.!?])', text)
+    sentences = _SENT_SPLIT_RE.split(text)
     chunks = []
     current_chunk = ""
     
@@ -300,12 +339,7 @@ async def generate_voiced_courseware(
     speed: float = 1.0
 ) -> str:
     # 查找课件
-    courseware = None
-    for cw in COURSEWARE_DB:
-        if cw.file_id == file_id:
-            courseware = cw
-            break
-    
+    courseware = COURSEWARE_INDEX.get(file_id)
     if not courseware:
         raise ValueError("课件未找到")
     
@@ -316,13 +350,10 @@ async def generate_voiced_courseware(
             raise ValueError("文本提取失败")
         
         # 重新获取更新后的课件
-        for cw in COURSEWARE_DB:
-            if cw.file_id == file_id:
-                courseware = cw
-                break
+        courseware = COURSEWARE_INDEX.get(file_id)
     
     # 创建任务
-    task_id = f"course_task_{int(time.time())}_{file_id[-6:]}"
+    task_id = f"course_task_{int(time.time())}_{next(_ID_COUNTER):06d}"
     task = CoursewareTaskDB(
         task_id=task_id,
         file_id=file_id,
@@ -338,6 +369,7 @@ async def generate_voiced_courseware(
     
     # 添加到"数据库"
     COURSEWARE_TASKS_DB.append(task)
+    COURSEWARE_TASKS_INDEX[task_id] = task
     await save_courseware_tasks_db()
     
     # 异步处理任务
@@ -348,36 +380,23 @@ async def generate_voiced_courseware(
 # 处理课件任务
 async def process_courseware_task(task_id: str):
     # 查找任务
-    task = None
-    for t in COURSEWARE_TASKS_DB:
-        if t.task_id == task_id:
-            task = t
-            break
-    
+    task = COURSEWARE_TASKS_INDEX.get(task_id)
     if not task:
         print(f"任务未找到: {task_id}")
         return
     
     try:
         # 查找课件
-        courseware = None
-        for cw in COURSEWARE_DB:
-            if cw.file_id == task.file_id:
-                courseware = cw
-                break
-        
+        courseware = COURSEWARE_INDEX.get(task.file_id)
         if not courseware:
             raise ValueError(f"课件未找到: {task.file_id}")
         
         # 更新状态
-        for i, t in enumerate(COURSEWARE_TASKS_DB):
-            if t.task_id == task_id:
-                COURSEWARE_TASKS_DB[i].status = "processing"
-                COURSEWARE_TASKS_DB[i].progress = 0.1
-                COURSEWARE_TASKS_DB[i].updated_at = datetime.now()
-                break
-        
-        await save_courseware_tasks_db()
+        task.status = "processing"
+        task.progress = 0.1
+        task.updated_at = datetime.now()
+
+        mark_courseware_tasks_dirty()
         
         # 创建输出目录
         output_dir = os.path.join(settings.UPLOAD_DIR, "voiced_courseware")
@@ -389,12 +408,9 @@ async def process_courseware_task(task_id: str):
         output_path = os.path.join(output_dir, f"{task_id}_{output_filename}")
         
         # 更新任务输出文件名
-        for i, t in enumerate(COURSEWARE_TASKS_DB):
-            if t.task_id == task_id:
-                COURSEWARE_TASKS_DB[i].output_filename = output_filename
-                break
-        
-        await save_courseware_tasks_db()
+        task.output_filename = output_filename
+
+        mark_courseware_tasks_dirty()
         
         # 创建音频目录
         audio_dir = os.path.join(output_dir, f"{task_id}_audio")
@@ -406,15 +422,11 @@ async def process_courseware_task(task_id: str):
         
         for i, slide in enumerate(courseware.extracted_text):
             # 更新进度
-            progress = 0.1 + (0.8 * ((i+1) / slides_total))
-            for j, t in enumerate(COURSEWARE_TASKS_DB):
-                if t.task_id == task_id:
-                    COURSEWARE_TASKS_DB[j].progress = progress
-                    COURSEWARE_TASKS_DB[j].slides_processed = i + 1
-                    COURSEWARE_TASKS_DB[j].updated_at = datetime.now()
-                    break
-            
-            await save_courseware_tasks_db()
+            task.progress = 0.1 + (0.8 * ((i+1) / slides_total))
+            task.slides_processed = i + 1
+            task.updated_at = datetime.now()
+
+            mark_courseware_tasks_dirty()
             
             # 准备幻灯片文本
             slide_text = ""
@@ -442,26 +454,18 @@ async def process_courseware_task(task_id: str):
                 
                 # 提交TTS任务
                 try:
-                    # 使用临时的BackgroundTasks对象，因为我们需要等待TTS完成
-                    temp_bg_tasks = BackgroundTasks()
-                    tts_task_id = await synthesize_speech(
-                        temp_bg_tasks, 
-                        chunk, 
-                        task.voice_id, 
+                    # 协程版任务创建直接在事件循环上调度，
+                    # 不再借用临时 BackgroundTasks 对象当跳板
+                    tts_task_id = await create_tts_task(
+                        chunk,
+                        task.voice_id,
                         tts_params
                     )
                     
-                    # 手动启动TTS任务处理
-                    await temp_bg_tasks()
-                    
-                    # 等待TTS任务完成
-                    await asyncio.sleep(1)  # 等待一会，让TTS任务启动
-                    
-                    while True:
-                        tts_status = await get_tts_task_status(tts_task_id)
-                        if tts_status and tts_status.status in ["completed", "failed"]:
-                            break
-                        await asyncio.sleep(0.5)
+                    # 等待TTS完成事件，免去轮询的 0.5 秒粒度延迟
+                    await asyncio.wait_for(get_tts_event(tts_task_id).wait(),
+                                           timeout=300.0)
+                    tts_status = await get_tts_task_status(tts_task_id)
                     
                     if tts_status and tts_status.status == "completed":
                         # 获取TTS结果
@@ -491,12 +495,9 @@ async def process_courseware_task(task_id: str):
             })
         
         # 更新进度
-        for i, t in enumerate(COURSEWARE_TASKS_DB):
-            if t.task_id == task_id:
-                COURSEWARE_TASKS_DB[i].progress = 0.9
-                COURSEWARE_TASKS_DB[i].slides_processed = slides_total
-                COURSEWARE_TASKS_DB[i].updated_at = datetime.now()
-                break
+        task.progress = 0.9
+        task.slides_processed = slides_total
+        task.updated_at = datetime.now()
         
         await save_courseware_tasks_db()
         
@@ -506,60 +507,54 @@ async def process_courseware_task(task_id: str):
         
         # 创建包含幻灯片和音频路径的清单文件
         manifest_path = os.path.join(output_dir, f"{task_id}_manifest.json")
-        with open(manifest_path, "w") as f:
-            manifest = {
-                "task_id": task_id,
-                "courseware": {
-                    "file_id": courseware.file_id,
-                    "name": courseware.name,
-                    "original_filename": courseware.original_filename
-                },
-                "output_file": output_path,
-                "slides": tts_tasks
-            }
-            json.dump(manifest, f, default=str)
+        manifest = {
+            "task_id": task_id,
+            "courseware": {
+                "file_id": courseware.file_id,
+                "name": courseware.name,
+                "original_filename": courseware.original_filename
+            },
+            "output_file": output_path,
+            "slides": tts_tasks
+        }
+        await asyncio.to_thread(_write_json_sync, manifest_path,
+                                json.dumps(manifest, default=str).encode('utf-8'))
         
         # 更新任务完成状态
-        for i, t in enumerate(COURSEWARE_TASKS_DB):
-            if t.task_id == task_id:
-                COURSEWARE_TASKS_DB[i].status = "completed"
-                COURSEWARE_TASKS_DB[i].progress = 1.0
-                COURSEWARE_TASKS_DB[i].updated_at = datetime.now()
-                COURSEWARE_TASKS_DB[i].file_path = output_path
-                break
+        task.status = "completed"
+        task.progress = 1.0
+        task.updated_at = datetime.now()
+        task.file_path = output_path
         
         await save_courseware_tasks_db()
         print(f"课件处理任务完成: {task_id}, 文件: {output_path}")
         
     except Exception as e:
         # 更新任务状态为失败
-        for i, t in enumerate(COURSEWARE_TASKS_DB):
-            if t.task_id == task_id:
-                COURSEWARE_TASKS_DB[i].status = "failed"
-                COURSEWARE_TASKS_DB[i].error = str(e)
-                COURSEWARE_TASKS_DB[i].updated_at = datetime.now()
-                break
+        task.status = "failed"
+        task.error = str(e)
+        task.updated_at = datetime.now()
         
         await save_courseware_tasks_db()
         print(f"课件处理任务失败: {task_id}, 错误: {e}")
 
 # 获取任务状态
 async def get_task_status(task_id: str) -> Optional[CoursewareTaskStatus]:
-    for task in COURSEWARE_TASKS_DB:
-        if task.task_id == task_id:
-            return CoursewareTaskStatus(
-                task_id=task.task_id,
-                name=task.name,
-                status=task.status,
-                progress=task.progress,
-                created_at=task.created_at,
-                updated_at=task.updated_at,
-                slides_processed=task.slides_processed,
-                total_slides=task.total_slides,
-                output_filename=task.output_filename,
-                error=task.error
-            )
-    
+    task = COURSEWARE_TASKS_INDEX.get(task_id)
+    if task:
+        return CoursewareTaskStatus(
+            task_id=task.task_id,
+            name=task.name,
+            status=task.status,
+            progress=task.progress,
+            created_at=task.created_at,
+            updated_at=task.updated_at,
+            slides_processed=task.slides_processed,
+            total_slides=task.total_slides,
+            output_filename=task.output_filename,
+            error=task.error
+        )
+
     return None
 
 # 获取任务结果
@@ -567,12 +562,11 @@ async def get_task_result(task_id: str) -> Optional[CoursewareTaskStatus]:
     status = await get_task_status(task_id)
     if status and status.status == "completed":
         # 找到对应任务获取文件路径
-        for task in COURSEWARE_TASKS_DB:
-            if task.task_id == task_id:
-                if os.path.exists(task.file_path):
-                    return status
-    
+        task = COURSEWARE_TASKS_INDEX.get(task_id)
+        if task and os.path.exists(task.file_path):
+            return status
+
     return None
 
-# 初始化服务
-asyncio.create_task(init_course_service())
\ No newline at end of file
+# 初始化改由应用启动事件触发（见 integration.register_startup），
+# 模块导入时直接 create_task 在无事件循环时会抛 RuntimeError
@@ -3,21 +3,23 @@ import json
 import asyncio
 from datetime import datetime
 from typing import Dict, List, Optional
-from app.services.tts_service import tts_model, init_tts_service
 from app.services.voice_clone import voice_cloner
 import app.utils.tts_metrics as tts_metrics
 from fastapi import FastAPI, BackgroundTasks, HTTPException, Depends, UploadFile
 from app.services.voice_service import (
-    get_voice_samples, 
+    get_voice_samples,
     compare_voice_samples,
     process_voice_sample
 )
-from app.services.tts_service import (
-    synthesize_speech, 
-    get_tts_task_status, 
+from app.services.paddlespeech_tts import (
+    init_tts_service,
+    synthesize_speech,
+    get_tts_task_status,
     get_tts_task_result
 )
+from app.services.paddlespeech_asr import init_asr_service
 from app.services.course_service import (
+    init_course_service,
     upload_courseware,
     extract_text,
     generate_voiced_courseware,
@@ -25,6 +27,7 @@ from app.services.course_service import (
     get_task_result as get_course_task_result
 )
 from app.services.replace_service import (
+    init_replace_service,
     upload_media,
     transcribe_media,
     replace_voice,
@@ -281,6 +284,9 @@ async def startup_event():
 def register_startup(app: FastAPI):
     app.add_event_handler("startup", startup_event)
     app.add_event_handler("startup", init_tts_service)
+    app.add_event_handler("startup", init_replace_service)
+    app.add_event_handler("startup", init_course_service)
+    app.add_event_handler("startup", init_asr_service)
 # Get the metrics
 async def get_app_metrics():
     return await metrics_service.get_metrics()
\ No newline at end of file
@@ -1,6 +1,6 @@
 """视频音频转录，语音识别服务"""
 import os
-import json
+import re
 import time
 import asyncio
 import numpy as np
@@ -24,11 +24,28 @@ except ImportError:
     print("警告: PaddleSpeech 不可用，请确保已安装 paddlepaddle 和 paddlespeech 库。")
 
 # 全局变量
-TRANSCRIPTION_TASKS_DB = []
-TRANSCRIPTION_TASKS_FILE = os.path.join(settings.UPLOAD_DIR, "transcription_tasks.json")
+# 转写任务库由 replace_service 统一持有和持久化（快照+日志），
+# 本模块通过其公开助手读写，避免两个模块各自重写同一个快照文件
 asr_executor = None
 text_executor = None
 
+# 限制并发转写数量，避免多个线程争用同一个 ASR 模型
+_asr_semaphore = asyncio.Semaphore(1)
+
+# 按语言特化的分句正则：纯中文/纯英文文本不必逐字符扫描两套标点
+_SENTENCE_RE_BY_LANG = {
+    "zh": re.compile(r'[^。！？；\n]+[。！？；\n]?'),
+    "en": re.compile(r'[^.!?;\n]+[.!?;\n]?'),
+}
+# 未知语言退回到合并标点集
+_SENTENCE_RE_DEFAULT = re.compile(r'[^。！？；\n.!?;]+[。！？；\n.!?;]?')
+
+# 各语言对应的 ASR 模型名，模块级常量避免每次调用重新构造
+_MODEL_BY_LANG = {
+    "zh": "conformer_wenetspeech",
+    "en": "conformer_en",
+}
+
 class PaddleSpeechASR:
     """PaddleSpeech ASR 模型封装类"""
     
@@ -54,6 +71,30 @@ class PaddleSpeechASR:
             self.asr = None
             self.text = None
     
+    def warmup(self):
+        """用一小段静音预热 ASR 模型，让首个真实请求不再付出冷启动开销"""
+        if not PADDLESPEECH_AVAILABLE or self.asr is None:
+            return
+
+        warmup_path = None
+        try:
+            # 0.5 秒 16kHz 静音足以触发模型加载和内核初始化
+            silence = np.zeros(8000, dtype=np.float32)
+            fd, warmup_path = tempfile.mkstemp(suffix=".wav")
+            os.close(fd)
+            sf.write(warmup_path, silence, 16000)
+            self.asr(
+                audio_file=warmup_path,
+                model=_MODEL_BY_LANG["zh"],
+                lang="zh",
+                device=self.device
+            )
+        except Exception as e:
+            print(f"ASR 模型预热失败: {e}")
+        finally:
+            if warmup_path and os.path.exists(warmup_path):
+                os.remove(warmup_path)
+
     def transcribe(self, audio_path: str, language: str = "zh") -> List[Dict[str, Any]]:
         """
         使用 PaddleSpeech ASR 转写音频
@@ -71,7 +112,7 @@ class PaddleSpeechASR:
         
         try:
             # 选择合适的模型
-            model = "conformer_wenetspeech" if language == "zh" else "conformer_en"
+            model = _MODEL_BY_LANG.get(language, _MODEL_BY_LANG["en"])
             
             # 执行转写
             result = self.asr(
@@ -101,7 +142,7 @@ class PaddleSpeechASR:
                     print(f"添加标点符号失败: {e}")
             
             # 对于没有详细时间戳的情况，创建估计的时间信息
-            segments = self._estimate_segments(text, audio_path)
+            segments = self._estimate_segments(text, audio_path, language)
             
             return segments
             
@@ -109,42 +150,30 @@ class PaddleSpeechASR:
             print(f"PaddleSpeech ASR 转写失败: {e}")
             return self._placeholder_transcribe(audio_path, language)
     
-    def _estimate_segments(self, text: str, audio_path: str) -> List[Dict[str, Any]]:
+    def _estimate_segments(self, text: str, audio_path: str, language: str = "zh") -> List[Dict[str, Any]]:
         """估计文本段落的时间戳"""
         segments = []
-        
+
         try:
-            # 获取音频总时长
-            audio, sr = sf.read(audio_path)
-            total_duration = len(audio) / sr
-            
+            # 获取音频总时长（只读文件头，不解码整段音频）
+            info = sf.info(audio_path)
+            total_duration = info.frames / info.samplerate
+
             # 分割文本为句子
-            sentences = self._split_text_to_sentences(text)
+            sentences = self._split_text_to_sentences(text, language)
             
             # 估计每个句子的时长
             if len(sentences) > 0:
-                avg_duration = total_duration / len(sentences)
-                
-                # 为每个句子分配时间段
-                start_time = 0.0
-                for i, sentence in enumerate(sentences):
-                    # 根据句子长度调整时长
-                    sentence_duration = avg_duration * (len(sentence) / (len(text) / len(sentences)))
-                    end_time = start_time + sentence_duration
-                    
-                    # 确保不超过总时长
-                    end_time = min(end_time, total_duration)
-                    
-                    # 创建段落信息
-                    segment = {
-                        'start': start_time,
-                        'end': end_time,
-                        'text': sentence
-                    }
-                    segments.append(segment)
-                    
-                    # 更新下一句的开始时间
-                    start_time = end_time
+                # 按句子长度比例分配时长，向量化计算代替逐句的 Python 循环
+                lengths = np.fromiter((len(s) for s in sentences), dtype=np.int64)
+                ends = np.cumsum(lengths) * (total_duration / lengths.sum())
+                np.minimum(ends, total_duration, out=ends)
+                starts = np.concatenate(([0.0], ends[:-1]))
+
+                segments = [
+                    {'start': float(start), 'end': float(end), 'text': sentence}
+                    for start, end, sentence in zip(starts, ends, sentences)
+                ]
             else:
                 # 如果没有成功分句，将整个文本作为一个段落
                 segments.append({
@@ -164,46 +193,27 @@ class PaddleSpeechASR:
         
         return segments
     
-    def _split_text_to_sentences(self, text: str) -> List[str]:
-        """将文本分割为句子"""
-        # 中文标点符号
-        cn_punctuations = ['。', '！', '？', '；', '\n']
-        # 英文标点符号
-        en_punctuations = ['.', '!', '?', ';', '\n']
-        
-        # 合并所有标点符号
-        all_punctuations = cn_punctuations + en_punctuations
-        
-        # 初始化结果列表和当前句子
-        sentences = []
-        current_sentence = ""
-        
-        # 逐字符处理文本
-        for char in text:
-            current_sentence += char
-            
-            # 如果遇到标点符号，结束当前句子
-            if char in all_punctuations:
-                if current_sentence.strip():
-                    sentences.append(current_sentence.strip())
-                current_sentence = ""
-        
-        # 处理最后可能剩余的文本
-        if current_sentence.strip():
-            sentences.append(current_sentence.strip())
-        
+    def _split_text_to_sentences(self, text: str, language: str = "zh") -> List[str]:
+        """将文本按检测到的语言分割为句子"""
+        pattern = _SENTENCE_RE_BY_LANG.get(language, _SENTENCE_RE_DEFAULT)
+        sentences = [
+            match.group(0).strip()
+            for match in pattern.finditer(text)
+            if match.group(0).strip()
+        ]
+
         # 如果没有找到句子，将整个文本作为一个句子
         if not sentences and text.strip():
             sentences = [text.strip()]
-            
+
         return sentences
     
     def _placeholder_transcribe(self, audio_path: str, language: str = "zh") -> List[Dict[str, Any]]:
         """当 ASR 服务不可用时的替代实现"""
         try:
-            # 获取音频时长
-            audio, sr = sf.read(audio_path)
-            total_duration = len(audio) / sr
+            # 获取音频时长（只读文件头，不解码整段音频）
+            info = sf.info(audio_path)
+            total_duration = info.frames / info.samplerate
             
             # 创建模拟转写结果
             dummy_text = "这是一段示例文本，用于代替实际的语音识别结果。" if language == "zh" else "This is a sample text to replace actual speech recognition results."
@@ -246,31 +256,17 @@ class PaddleSpeechASR:
 
 # 初始化 PaddleSpeech ASR 服务
 async def init_asr_service():
-    global TRANSCRIPTION_TASKS_DB, asr_executor
-    
+    global asr_executor
+
     # 确保目录存在
     os.makedirs(os.path.join(settings.UPLOAD_DIR, "transcriptions"), exist_ok=True)
-    
-    # 加载现有任务
-    if os.path.exists(TRANSCRIPTION_TASKS_FILE):
-        try:
-            with open(TRANSCRIPTION_TASKS_FILE, 'r') as f:
-                data = json.load(f)
-                TRANSCRIPTION_TASKS_DB = [TranscriptionTaskDB(**item) for item in data]
-        except Exception as e:
-            print(f"初始化 ASR 服务失败: {e}")
-    
-    # 初始化 PaddleSpeech ASR 模型
+
+    # 转写任务的加载与落盘由 init_replace_service 负责，这里只初始化模型
+    # 初始化 PaddleSpeech ASR 模型，并在线程中预热，避免阻塞事件循环
     asr_executor = PaddleSpeechASR()
-    
-    print("PaddleSpeech ASR 服务初始化完成")
+    await asyncio.to_thread(asr_executor.warmup)
 
-# 保存任务到文件
-async def save_transcription_tasks():
-    with open(TRANSCRIPTION_TASKS_FILE, 'w') as f:
-        # 转换为字典列表并保存
-        data = [task.dict() for task in TRANSCRIPTION_TASKS_DB]
-        json.dump(data, f, default=str)
+    print("PaddleSpeech ASR 服务初始化完成")
 
 # 处理音频转写任务
 async def transcribe_media(
@@ -288,16 +284,16 @@ async def transcribe_media(
         task_id: 转写任务ID
     """
     # 查找媒体文件
-    media_file = None
-    from app.services.replace_service import MEDIA_FILES_DB
-    for mf in MEDIA_FILES_DB:
-        if mf.file_id == file_id:
-            media_file = mf
-            break
-    
+    from app.services.replace_service import (
+        MEDIA_FILES_INDEX,
+        add_transcription_task,
+        persist_transcription_task,
+    )
+    media_file = MEDIA_FILES_INDEX.get(file_id)
+
     if not media_file:
         raise ValueError("媒体文件未找到")
-    
+
     # 创建转写任务
     task_id = f"transcribe_{int(time.time())}_{file_id[-6:]}"
     task = TranscriptionTaskDB(
@@ -308,10 +304,10 @@ async def transcribe_media(
         progress=0.0,
         created_at=datetime.now()
     )
-    
-    # 添加到"数据库"
-    TRANSCRIPTION_TASKS_DB.append(task)
-    await save_transcription_tasks()
+
+    # 添加到 replace_service 统一持有的任务库并落盘
+    add_transcription_task(task)
+    await persist_transcription_task(task)
     
     # 异步处理任务
     background_tasks.add_task(process_transcription_task, task_id)
@@ -321,27 +317,25 @@ async def transcribe_media(
 # 处理转写任务
 async def process_transcription_task(task_id: str):
     global asr_executor
-    
+
+    from app.services.replace_service import (
+        MEDIA_FILES_INDEX,
+        TRANSCRIPTION_TASKS_INDEX,
+        mark_transcription_task_dirty,
+        persist_transcription_task,
+    )
+
     # 查找任务
-    task = None
-    for t in TRANSCRIPTION_TASKS_DB:
-        if t.task_id == task_id:
-            task = t
-            break
-    
+    task = TRANSCRIPTION_TASKS_INDEX.get(task_id)
+
     if not task:
         print(f"任务未找到: {task_id}")
         return
-    
+
     try:
         # 查找媒体文件
-        media_file = None
-        from app.services.replace_service import MEDIA_FILES_DB
-        for mf in MEDIA_FILES_DB:
-            if mf.file_id == task.file_id:
-                media_file = mf
-                break
-        
+        media_file = MEDIA_FILES_INDEX.get(task.file_id)
+
         if not media_file:
             raise ValueError(f"媒体文件未找到: {task.file_id}")
         
@@ -349,7 +343,7 @@ async def process_transcription_task(task_id: str):
         task.status = "processing"
         task.progress = 0.1
         task.updated_at = datetime.now()
-        await save_transcription_tasks()
+        mark_transcription_task_dirty(task)
         
         # 创建输出目录
         output_dir = os.path.join(settings.UPLOAD_DIR, "transcriptions")
@@ -362,12 +356,16 @@ async def process_transcription_task(task_id: str):
             language = "en"
         
         # 使用 PaddleSpeech ASR 转写
-        transcription_result = asr_executor.transcribe(media_file.file_path, language)
+        # 转写是同步的 CPU/GPU 密集调用，放到线程中执行以免阻塞事件循环
+        async with _asr_semaphore:
+            transcription_result = await asyncio.to_thread(
+                asr_executor.transcribe, media_file.file_path, language
+            )
         
         # 更新进度
         task.progress = 0.6
         task.updated_at = datetime.now()
-        await save_transcription_tasks()
+        mark_transcription_task_dirty(task)
         
         # 创建转写对象
         segments = []
@@ -378,15 +376,15 @@ async def process_transcription_task(task_id: str):
                 text=segment['text']
             ))
         
-        # 获取音频总时长
+        # 获取音频总时长：段落按时间顺序生成，末尾段落的结束时间即为总时长
         total_duration = 0
         if segments:
-            total_duration = max(segment.end for segment in segments)
+            total_duration = segments[-1].end
         else:
             # 尝试获取媒体文件时长
             try:
-                audio, sr = sf.read(media_file.file_path)
-                total_duration = len(audio) / sr
+                info = sf.info(media_file.file_path)
+                total_duration = info.frames / info.samplerate
             except Exception:
                 # 使用文件大小估计时长（非常粗略的估计）
                 total_duration = media_file.file_size / (16000 * 2 * 2)  # 假设 16kHz, 16bit, 立体声
@@ -397,51 +395,47 @@ async def process_transcription_task(task_id: str):
             total_duration=total_duration
         )
         
-        # 生成 SRT 字幕文件
+        # 生成 SRT / VTT 字幕文件
+        # 单次遍历同时生成两种格式：时间码只计算一次，SRT 与 VTT 仅毫秒分隔符不同
+        # 先在内存中拼好整个文件，再一次性写盘，避免每个段落多次小块写入
         srt_path = os.path.join(output_dir, f"{task_id}.srt")
-        with open(srt_path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(segments):
-                f.write(f"{i+1}\n")
-                
-                # 格式化时间码 (HH:MM:SS,mmm)
-                start_h = int(segment.start / 3600)
-                start_m = int((segment.start % 3600) / 60)
-                start_s = int(segment.start % 60)
-                start_ms = int((segment.start % 1) * 1000)
-                
-                end_h = int(segment.end / 3600)
-                end_m = int((segment.end % 3600) / 60)
-                end_s = int(segment.end % 60)
-                end_ms = int((segment.end % 1) * 1000)
-                
-                time_str = f"{start_h:02d}:{start_m:02d}:{start_s:02d},{start_ms:03d} --> "
-                time_str += f"{end_h:02d}:{end_m:02d}:{end_s:02d},{end_ms:03d}"
-                
-                f.write(f"{time_str}\n")
-                f.write(f"{segment.text}\n\n")
-        
-        # 生成 VTT 字幕文件
         vtt_path = os.path.join(output_dir, f"{task_id}.vtt")
-        with open(vtt_path, "w", encoding="utf-8") as f:
-            f.write("WEBVTT\n\n")
-            
-            for i, segment in enumerate(segments):
-                # 格式化时间码 (HH:MM:SS.mmm)
-                start_h = int(segment.start / 3600)
-                start_m = int((segment.start % 3600) / 60)
-                start_s = int(segment.start % 60)
-                start_ms = int((segment.start % 1) * 1000)
-                
-                end_h = int(segment.end / 3600)
-                end_m = int((segment.end % 3600) / 60)
-                end_s = int(segment.end % 60)
-                end_ms = int((segment.end % 1) * 1000)
-                
-                time_str = f"{start_h:02d}:{start_m:02d}:{start_s:02d}.{start_ms:03d} --> "
-                time_str += f"{end_h:02d}:{end_m:02d}:{end_s:02d}.{end_ms:03d}"
-                
-                f.write(f"{time_str}\n")
-                f.write(f"{segment.text}\n\n")
+        srt_parts = []
+        vtt_parts = ["WEBVTT\n\n"]
+        for i, segment in enumerate(segments):
+            # 格式化时间码 (HH:MM:SS + 毫秒)
+            start_h = int(segment.start / 3600)
+            start_m = int((segment.start % 3600) / 60)
+            start_s = int(segment.start % 60)
+            start_ms = int((segment.start % 1) * 1000)
+
+            end_h = int(segment.end / 3600)
+            end_m = int((segment.end % 3600) / 60)
+            end_s = int(segment.end % 60)
+            end_ms = int((segment.end % 1) * 1000)
+
+            start_core = f"{start_h:02d}:{start_m:02d}:{start_s:02d}"
+            end_core = f"{end_h:02d}:{end_m:02d}:{end_s:02d}"
+            start_ms_str = f"{start_ms:03d}"
+            end_ms_str = f"{end_ms:03d}"
+
+            srt_parts.append(
+                f"{i+1}\n{start_core},{start_ms_str} --> {end_core},{end_ms_str}\n"
+                f"{segment.text}\n\n"
+            )
+            vtt_parts.append(
+                f"{start_core}.{start_ms_str} --> {end_core}.{end_ms_str}\n"
+                f"{segment.text}\n\n"
+            )
+
+        # 先写临时文件再原子替换，避免下载请求读到写了一半的字幕
+        with open(srt_path + ".tmp", "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.write("".join(srt_parts))
+        os.replace(srt_path + ".tmp", srt_path)
+
+        with open(vtt_path + ".tmp", "w", encoding="utf-8", buffering=1 << 20) as f:
+            f.write("".join(vtt_parts))
+        os.replace(vtt_path + ".tmp", vtt_path)
         
         # 更新任务状态
         task.status = "completed"
@@ -452,35 +446,37 @@ async def process_transcription_task(task_id: str):
             "srt": srt_path,
             "vtt": vtt_path
         }
-        await save_transcription_tasks()
-        
+        await persist_transcription_task(task)
+
         print(f"转写任务完成: {task_id}")
-        
+
     except Exception as e:
         # 更新任务状态为失败
         task.status = "failed"
         task.error = str(e)
         task.updated_at = datetime.now()
-        await save_transcription_tasks()
+        await persist_transcription_task(task)
         
         print(f"转写任务失败: {task_id}, 错误: {e}")
 
 # 获取转写结果
 async def get_transcription(task_id: str) -> Optional[Transcription]:
     """获取转写结果"""
-    for task in TRANSCRIPTION_TASKS_DB:
-        if task.task_id == task_id and task.status == "completed":
-            return task.transcription
-    
+    from app.services.replace_service import TRANSCRIPTION_TASKS_INDEX
+    task = TRANSCRIPTION_TASKS_INDEX.get(task_id)
+    if task and task.status == "completed":
+        return task.transcription
+
     return None
 
 # 获取字幕文件
 async def get_subtitles(task_id: str, format: str = "srt") -> Optional[str]:
     """获取字幕文件内容"""
-    for task in TRANSCRIPTION_TASKS_DB:
-        if task.task_id == task_id and task.status == "completed" and task.subtitles_path:
-            if format in task.subtitles_path and os.path.exists(task.subtitles_path[format]):
-                with open(task.subtitles_path[format], "r", encoding="utf-8") as f:
-                    return f.read()
-    
+    from app.services.replace_service import TRANSCRIPTION_TASKS_INDEX
+    task = TRANSCRIPTION_TASKS_INDEX.get(task_id)
+    if task and task.status == "completed" and task.subtitles_path:
+        if format in task.subtitles_path and os.path.exists(task.subtitles_path[format]):
+            with open(task.subtitles_path[format], "r", encoding="utf-8") as f:
+                return f.read()
+
     return None
\ No newline at end of file
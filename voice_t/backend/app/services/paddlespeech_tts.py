@@ -1,12 +1,19 @@
 import os
+import re
 import json
 import time
+import uuid
+import hashlib
+import itertools
+import atexit
+import shutil
 import asyncio
 import numpy as np
 import wave
 import tempfile
 import soundfile as sf
 from typing import Dict, Any, Optional, List, Tuple, BinaryIO
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
 from fastapi import BackgroundTasks, WebSocket
@@ -15,6 +22,7 @@ from app.models.tts import TTSTaskDB, TTSTaskStatus, TTSParams
 from app.services.voice_service import get_voice_samples
 from app.core.config import settings
 from app.utils.audio import normalize_audio, trim_audio
+from app.utils.persistence import DebouncedFlusher
 
 # Import PaddleSpeech
 try:
@@ -27,12 +35,184 @@ except ImportError:
     PADDLESPEECH_AVAILABLE = False
     print("警告: PaddleSpeech 不可用，请确保已安装 paddlepaddle 和 paddlespeech 库。")
 
-# 全局变量
-TTS_TASKS_DB = []
-TTS_TASKS_FILE = os.path.join(settings.UPLOAD_DIR, "tts_tasks.json")
+# orjson 序列化比标准库 json 快数倍，不可用时退回标准库
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# msgspec 编解码更快且复用预构建的 Encoder/Decoder，装了就优先用
+try:
+    import msgspec.json
+    _MSGSPEC_ENCODER = msgspec.json.Encoder()
+    _MSGSPEC_DECODER = msgspec.json.Decoder()
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+# librosa 较重（引入 numba、scikit-learn 等），在模块导入时一次性加载，
+# 避免首个带音调调整的请求在热路径上付出导入开销
+try:
+    import librosa
+    import librosa.effects
+    LIBROSA_AVAILABLE = True
+except ImportError:
+    LIBROSA_AVAILABLE = False
+    print("警告: librosa 不可用，音调调整将被跳过。")
+
+# 包络平滑的高斯 FIR 核：采样率固定时 sigma 固定，核按 sigma 缓存，
+# 每次合成直接卷积，省去 scipy 逐次重建核的开销（也不再依赖 scipy）
+_GAUSS_KERNELS: Dict[float, np.ndarray] = {}
+
+# 高斯核接近 2000 阶，直接卷积是 O(N*K)；包络超过核长后改走 FFT 频域
+# 乘法（O(N log N)），结果与线性卷积一致，长音频上快一个数量级
+def _smooth_envelope(envelope: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    n, k = envelope.size, kernel.size
+    if n <= k:
+        return np.convolve(envelope, kernel, mode='same')
+    # 补零到 2 的幂，FFT 在合数长度上会退化
+    nfft = 1 << (n + k - 2).bit_length()
+    spec = np.fft.rfft(envelope, nfft) * np.fft.rfft(kernel, nfft)
+    out = np.fft.irfft(spec, nfft)
+    start = (k - 1) // 2
+    return out[start:start + n].astype(envelope.dtype)
+
+def _gauss_kernel(sigma: float, truncate: float = 4.0) -> np.ndarray:
+    kernel = _GAUSS_KERNELS.get(sigma)
+    if kernel is None:
+        radius = int(truncate * sigma)
+        x = np.arange(-radius, radius + 1, dtype=np.float64)
+        kernel = np.exp(-0.5 * (x / sigma) ** 2)
+        kernel /= kernel.sum()
+        # 合成管线全程 float32，核也以 float32 存放，卷积不升格回 float64
+        kernel = kernel.astype(np.float32)
+        _GAUSS_KERNELS[sigma] = kernel
+    return kernel
+
+# 可选依赖：numba 可用时用 JIT 内核生成占位音频，不可用时退回 NumPy 实现
+try:
+    from numba import njit, prange
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# 分句正则：中英文标点一次性匹配，预编译避免逐字符循环
+_SENT_RE = re.compile(r'[^。！？；\n.!?;]+[。！？；\n.!?;]?')
+
+# 情感风格编码：JIT 内核只接受数值参数
+_EMOTION_CODES = {"neutral": 0, "happy": 1, "sad": 2, "serious": 3}
+
+if NUMBA_AVAILABLE:
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _placeholder_kernel(n, sample_rate, duration, base_freq,
+                            syllable_positions, syllable_width, emotion_code, energy):
+        """占位合成的融合内核：单次循环完成载波、谐波、包络、噪声、颤音与淡入淡出"""
+        audio = np.empty(n, dtype=np.float64)
+        two_pi = 2.0 * np.pi
+        fade_len = int(0.05 * sample_rate)
+        n_syll = syllable_positions.shape[0]
+        # 音节位置来自 linspace，等间距：最早覆盖当前时间的音节下标可
+        # 直接按间距取整求出，无需逐音节线性扫描
+        syll_step = (syllable_positions[1] - syllable_positions[0]
+                     if n_syll > 1 else duration)
+        for i in prange(n):
+            tt = duration * i / n
+
+            # 载波与谐波
+            carrier = np.sin(two_pi * base_freq * tt)
+            harmonics = 0.0
+            for k in range(2, 6):
+                harmonics += (1.0 / k) * np.sin(two_pi * base_freq * k * tt)
+            carrier = 0.7 * carrier + 0.3 * harmonics
+
+            # 音节包络：升余弦形状本身在边沿平滑，无需再做高斯滤波
+            envelope = 0.1
+            j = int(np.ceil((tt - syllable_width) / syll_step))
+            if j < 0:
+                j = 0
+            if j < n_syll:
+                rel = tt - syllable_positions[j]
+                if 0.0 <= rel <= syllable_width:
+                    envelope = 0.5 + 0.5 * np.sin(np.pi * rel / syllable_width)
+
+            # 情感风格
+            if emotion_code == 1:  # happy
+                carrier += 0.1 * np.sin(two_pi * 3.0 * tt / duration)
+                envelope = envelope ** 0.9
+            elif emotion_code == 2:  # sad
+                carrier -= 0.05 * np.sin(two_pi * 1.0 * tt / duration)
+                envelope = envelope ** 1.2
+            elif emotion_code == 3:  # serious
+                envelope = min(envelope ** 1.1, 0.9)
+
+            sample = carrier * envelope * energy
+
+            # 噪声模拟辅音 + 音高微小变化
+            sample += np.random.uniform(-0.05, 0.05) * envelope * 0.3
+            sample *= 1.0 + 0.03 * np.sin(two_pi * 5.0 * tt)
+
+            # 淡入淡出
+            if i < fade_len:
+                sample *= i / fade_len
+            elif i >= n - fade_len:
+                sample *= (n - 1 - i) / fade_len
+
+            audio[i] = sample
+
+        # 归一化并转为 16 位整数
+        peak = 1e-9
+        for i in range(n):
+            a = abs(audio[i])
+            if a > peak:
+                peak = a
+        scale = 0.95 * 32767.0 / peak
+        out = np.empty(n, dtype=np.int16)
+        for i in prange(n):
+            out[i] = np.int16(audio[i] * scale)
+        return out
+
+# 流式发送的帧大小：将引擎产出的小块合并到该大小再发送，摊薄每帧的协议与事件循环开销
+CHUNK_COALESCE_BYTES = 16384
+
+# 进程级共享临时目录：避免每次合成都 mkdtemp（且旧目录从不清理）
+_TTS_TMPDIR = tempfile.mkdtemp(prefix="paddletts_")
+atexit.register(shutil.rmtree, _TTS_TMPDIR, ignore_errors=True)
+
+# 现代 PCG64 生成器比传统 np.random 全局接口快数倍
+_RNG = np.random.default_rng()
+
+# 单声道 16 位 WAV 写出：样本一次性转成小端 int16 字节串，经大缓冲文件
+# 对象由 wave 模块整块写入，避免 libsndfile 的分块转换与逐块 write 调用
+def _write_wav(path: str, audio: np.ndarray, sample_rate: int):
+    if audio.dtype == np.int16:
+        pcm = audio.astype('<i2', copy=False)
+    else:
+        pcm = np.clip(audio * 32767.0, -32768, 32767).astype('<i2')
+    with open(path, 'wb', buffering=1 << 20) as f:
+        with wave.open(f, 'wb') as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(sample_rate)
+            w.writeframes(pcm.tobytes())
+
+# 全局变量：task_id -> 任务记录，O(1) 查找
+TTS_TASKS_DB: Dict[str, TTSTaskDB] = {}
+# 追加式 JSONL 日志：每次任务更新只写一行，启动时按 task_id 去重回放
+TTS_TASKS_FILE = os.path.join(settings.UPLOAD_DIR, "tts_tasks.jsonl")
+# 旧版整文件 JSON（仅用于一次性迁移）
+_LEGACY_TASKS_FILE = os.path.join(settings.UPLOAD_DIR, "tts_tasks.json")
+# 启动时日志超过该大小则压实为每任务一行的最新状态
+_COMPACT_THRESHOLD = 8 * 1024 * 1024
 tts_executor = None
 tts_online_engine = None
 
+# 保存去抖：进度更新只记录脏任务 ID，由后台协程统一落盘
+_dirty_task_ids = set()
+_tasks_flusher = DebouncedFlusher(lambda: _flush_tts_tasks(), interval=0.5)
+# 防止去抖协程与终态保存并发写同一文件
+_TASKS_LOCK = asyncio.Lock()
+
 class PaddleSpeechModel:
     """PaddleSpeech TTS 模型封装类"""
     
@@ -63,7 +243,32 @@ class PaddleSpeechModel:
             self.tts = None
             self.online_engine = None
     
-    def synthesize(self, text: str, params: Dict[str, Any], 
+    def warmup(self):
+        """预热 TTS 模型：触发 Paddle 的内核编译与自动调优，让首个真实请求不再付出冷启动开销"""
+        if not PADDLESPEECH_AVAILABLE or self.tts is None:
+            return
+
+        try:
+            self.tts(text="预热", am='fastspeech2_csmsc', voc='hifigan_csmsc',
+                     lang='zh', spk_id=0, device=self.device)
+        except Exception as e:
+            print(f"TTS 中文模型预热失败: {e}")
+
+        try:
+            self.tts(text="warmup", am='fastspeech2_ljspeech', voc='hifigan_ljspeech',
+                     lang='en', spk_id=0, device=self.device)
+        except Exception as e:
+            print(f"TTS 英文模型预热失败: {e}")
+
+        # 流式引擎取一个音频块即可完成预热
+        if self.online_engine is not None:
+            try:
+                for _ in self.online_engine.run("预热", speed_ratio=1.0, spk_id=0):
+                    break
+            except Exception as e:
+                print(f"流式 TTS 引擎预热失败: {e}")
+
+    def synthesize(self, text: str, params: Dict[str, Any],
                    speaker_embedding: Optional[np.ndarray] = None,
                    output_path: Optional[str] = None) -> Tuple[np.ndarray, float]:
         """
@@ -81,7 +286,14 @@ class PaddleSpeechModel:
         """
         if not PADDLESPEECH_AVAILABLE or self.tts is None:
             print("PaddleSpeech 不可用，使用替代实现")
-            return self._placeholder_synthesis(text, params)
+            audio, duration = self._placeholder_synthesis(text, params)
+            # 调用方会把 output_path 当作最终产物路径，替代实现也要写出文件
+            if output_path is not None:
+                _write_wav(output_path, audio, 24000)
+            return audio, duration
+        
+        # 输出路径处理：调用方不需要文件时写入共享临时目录，用完即删
+        temp_output = output_path is None
         
         try:
             # 配置合成参数
@@ -107,10 +319,8 @@ class PaddleSpeechModel:
             if speaker_embedding is not None and 'model_path' in params:
                 custom_model_path = params['model_path']
                 
-            # 输出路径处理
-            if output_path is None:
-                temp_dir = tempfile.mkdtemp()
-                output_path = os.path.join(temp_dir, "output.wav")
+            if temp_output:
+                output_path = os.path.join(_TTS_TMPDIR, f"out_{uuid.uuid4().hex}.wav")
             
             # 执行合成
             result = self.tts(
@@ -125,20 +335,40 @@ class PaddleSpeechModel:
                 device=self.device
             )
             
-            # 如果成功合成，加载音频文件
-            if os.path.exists(output_path):
-                audio, sr = sf.read(output_path)
-                
-                # 调整音调（需要进行后处理）
+            # 优先取执行器留在内存中的波形，省去对刚写出的 WAV 再做一次解码
+            audio = None
+            sr = 24000
+            try:
+                audio = np.asarray(self.tts._outputs['wav']).reshape(-1)
+                sr = int(self.tts.am_config.fs)
+            except (AttributeError, KeyError, TypeError):
+                audio = None
+
+            if audio is None and os.path.exists(output_path):
+                # int16 由 libsndfile 在 C 层直接转换，跳过默认 float64 中间缓冲
+                audio, sr = sf.read(output_path, dtype='int16', always_2d=False)
+
+            # 临时输出文件在读入内存后即可删除
+            if temp_output and os.path.exists(output_path):
+                os.remove(output_path)
+
+            if audio is not None:
+                # 调整音调（需要进行后处理）；接近 0 的音调直接跳过
                 pitch_shift = params.get('pitch', 0.0)
-                if pitch_shift != 0.0 and pitch_shift != 0:
-                    import librosa
+                if abs(pitch_shift) > 1e-3 and LIBROSA_AVAILABLE:
                     # 将 -1 到 1 的范围转换为半音数（-12 到 12）
                     n_steps = pitch_shift * 12
-                    audio = librosa.effects.pitch_shift(audio, sr=sr, n_steps=n_steps)
-                    
-                    # 应用更改后重新保存
-                    sf.write(output_path, audio, sr)
+                    # librosa 需要浮点输入；int16 样本先换算到 [-1, 1] 再换回
+                    if audio.dtype == np.int16:
+                        audio_f = audio.astype(np.float32) / 32768.0
+                        audio_f = librosa.effects.pitch_shift(audio_f, sr=sr, n_steps=n_steps)
+                        audio = (audio_f * 32767).astype(np.int16)
+                    else:
+                        audio = librosa.effects.pitch_shift(audio, sr=sr, n_steps=n_steps)
+
+                    # 应用更改后重新保存（仅当调用方需要输出文件）
+                    if not temp_output:
+                        sf.write(output_path, audio, sr)
                 
                 # 计算时长
                 duration = len(audio) / sr
@@ -150,7 +380,10 @@ class PaddleSpeechModel:
         except Exception as e:
             print(f"PaddleSpeech 合成失败: {e}")
             # 使用替代实现
-            return self._placeholder_synthesis(text, params)
+            audio, duration = self._placeholder_synthesis(text, params)
+            if not temp_output:
+                _write_wav(output_path, audio, 24000)
+            return audio, duration
     
     async def synthesize_streaming(self, text: str, params: Dict[str, Any], websocket: WebSocket,
                            speaker_embedding: Optional[np.ndarray] = None) -> float:
@@ -170,28 +403,23 @@ class PaddleSpeechModel:
             # 如果流式引擎不可用，使用普通合成并分块发送
             audio, duration = self._placeholder_synthesis(text, params)
             
-            # 分块发送音频
-            chunk_size = 4096  # 每块大小
+            # 按合并后的帧大小分块发送，由传输层背压节流，无需人为延迟
+            chunk_size = CHUNK_COALESCE_BYTES // audio.itemsize
             total_chunks = len(audio) // chunk_size + (1 if len(audio) % chunk_size > 0 else 0)
-            
+
             # 发送总块数信息
             await websocket.send_json({"type": "info", "total_chunks": total_chunks})
-            
-            # 逐块发送音频
+
+            # 逐块发送音频：切片是视图，memoryview 直接暴露底层缓冲，无需 tobytes 拷贝
+            audio_view = memoryview(np.ascontiguousarray(audio)).cast('B')
             for i in range(total_chunks):
-                start = i * chunk_size
-                end = min(start + chunk_size, len(audio))
-                chunk = audio[start:end].tobytes()
-                
-                # 发送音频块
-                await websocket.send_bytes(chunk)
-                
-                # 模拟处理延迟
-                await asyncio.sleep(0.05)
-            
+                start = i * chunk_size * audio.itemsize
+                end = min(start + chunk_size * audio.itemsize, len(audio_view))
+                await websocket.send_bytes(audio_view[start:end])
+
             # 发送完成标记
             await websocket.send_json({"type": "complete", "duration": float(duration)})
-            
+
             return duration
         
         try:
@@ -214,48 +442,78 @@ class PaddleSpeechModel:
                 device=self.device
             )
             
-            # 文本预处理（分句）
-            sentences = self._split_text_to_sentences(text)
-            
-            # 发送总句子数信息
+            # 文本预处理：按短窗口切分而非整句，降低首个音频块的等待时间
+            sentences = self._split_text_to_windows(text)
+
+            # 发送总窗口数信息（字段名保持兼容）
             await websocket.send_json({"type": "info", "total_sentences": len(sentences)})
             
-            # 合成并发送每个句子
-            total_audio_length = 0
-            for i, sentence in enumerate(sentences):
-                if not sentence.strip():
-                    continue
-                
-                # 流式合成当前句子
-                audio_chunks = []
-                is_last = False
-                
-                # 使用 PaddleSpeech 流式合成引擎
-                for audio_chunk in self.online_engine.run(
-                    sentence,
-                    speed_ratio=speed,
-                    volume=params.get('energy', 1.0),
-                    spk_id=0
-                ):
-                    # 收集音频块进行时长计算
-                    audio_chunks.append(audio_chunk)
-                    
-                    # 发送音频块
-                    await websocket.send_bytes(audio_chunk.tobytes())
-                    
-                    # 短暂延迟以避免客户端缓冲区溢出
-                    await asyncio.sleep(0.01)
-                
-                # 当前句子合成完毕
-                await websocket.send_json({
-                    "type": "sentence_complete", 
-                    "index": i,
-                    "total": len(sentences)
-                })
-                
-                # 累计音频长度
-                for chunk in audio_chunks:
-                    total_audio_length += len(chunk) / self.online_engine.sample_rate
+            # 生产者-消费者：合成填充队列，发送端并发排空，推理与网络发送相互重叠
+            queue: asyncio.Queue = asyncio.Queue(maxsize=8)
+
+            async def producer():
+                total = 0.0
+                for i, sentence in enumerate(sentences):
+                    if not sentence.strip():
+                        continue
+
+                    # 使用 PaddleSpeech 流式合成引擎
+                    for audio_chunk in self.online_engine.run(
+                        sentence,
+                        speed_ratio=speed,
+                        volume=params.get('energy', 1.0),
+                        spk_id=0
+                    ):
+                        total += len(audio_chunk) / self.online_engine.sample_rate
+                        await queue.put(("chunk", np.ascontiguousarray(audio_chunk)))
+
+                    # 当前句子合成完毕
+                    await queue.put(("sentence_complete", i))
+
+                await queue.put(None)
+                return total
+
+            async def consumer():
+                send_buf = bytearray()
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+
+                    kind, payload = item
+                    if kind == "chunk":
+                        # 合并小块后再发送，减少帧数；由传输层背压节流
+                        send_buf += memoryview(payload).cast('B')
+                        if len(send_buf) >= CHUNK_COALESCE_BYTES:
+                            await websocket.send_bytes(bytes(send_buf))
+                            send_buf.clear()
+                    else:
+                        # 句子边界：先冲刷缓冲，保证音频先于完成消息到达
+                        if send_buf:
+                            await websocket.send_bytes(bytes(send_buf))
+                            send_buf.clear()
+                        await websocket.send_json({
+                            "type": "sentence_complete",
+                            "index": payload,
+                            "total": len(sentences)
+                        })
+
+            # gather 不会在一方失败时取消另一方：消费端因客户端断连抛错后，
+            # 生产端会在有界队列上永久阻塞并泄漏引擎迭代器，必须显式取消对端
+            producer_task = asyncio.ensure_future(producer())
+            consumer_task = asyncio.ensure_future(consumer())
+            try:
+                total_audio_length, _ = await asyncio.gather(
+                    producer_task, consumer_task
+                )
+            finally:
+                for peer in (producer_task, consumer_task):
+                    if not peer.done():
+                        peer.cancel()
+                        try:
+                            await peer
+                        except (asyncio.CancelledError, Exception):
+                            pass
             
             # 全部合成完毕
             await websocket.send_json({
@@ -273,12 +531,10 @@ class PaddleSpeechModel:
             # 退回到非流式方式
             audio, duration = self._placeholder_synthesis(text, params)
             
-            # 分块发送音频
-            chunk_size = 4096
-            for i in range(0, len(audio), chunk_size):
-                chunk = audio[i:i+chunk_size].tobytes()
-                await websocket.send_bytes(chunk)
-                await asyncio.sleep(0.05)
+            # 按合并后的帧大小分块发送，memoryview 切片不产生拷贝
+            audio_view = memoryview(np.ascontiguousarray(audio)).cast('B')
+            for i in range(0, len(audio_view), CHUNK_COALESCE_BYTES):
+                await websocket.send_bytes(audio_view[i:i+CHUNK_COALESCE_BYTES])
             
             # 发送完成信息
             await websocket.send_json({"type": "complete", "duration": float(duration)})
@@ -286,87 +542,113 @@ class PaddleSpeechModel:
             return duration
     
     def _split_text_to_sentences(self, text: str) -> List[str]:
-        """将文本分割为句子"""
-        # 中文标点符号
-        cn_punctuations = ['。', '！', '？', '；', '\n']
-        # 英文标点符号
-        en_punctuations = ['.', '!', '?', ';', '\n']
-        
-        # 合并所有标点符号
-        all_punctuations = cn_punctuations + en_punctuations
-        
-        # 初始化结果列表和当前句子
-        sentences = []
-        current_sentence = ""
-        
-        # 逐字符处理文本
-        for char in text:
-            current_sentence += char
-            
-            # 如果遇到标点符号，结束当前句子
-            if char in all_punctuations:
-                if current_sentence.strip():
-                    sentences.append(current_sentence.strip())
-                current_sentence = ""
-        
-        # 处理最后可能剩余的文本
-        if current_sentence.strip():
-            sentences.append(current_sentence.strip())
-        
+        """将文本分割为句子：预编译正则一次扫描，替代逐字符拼接"""
+        sentences = [m.group(0).strip() for m in _SENT_RE.finditer(text) if m.group(0).strip()]
+
         # 如果没有找到句子，将整个文本作为一个句子
         if not sentences and text.strip():
             sentences = [text.strip()]
-            
+
         return sentences
     
+    def _split_text_to_windows(self, text: str, max_chars: int = 30) -> List[str]:
+        """将文本切成不超过 max_chars 的短窗口
+
+        流式合成按窗口送入引擎，开头的长句子不再需要整句合成完毕才能
+        发出第一个音频块。优先按句子边界切分，超长句子在窗口内尽量在
+        空格处断开（英文），否则按字符数硬切。
+        """
+        windows = []
+        for sentence in self._split_text_to_sentences(text):
+            if len(sentence) <= max_chars:
+                windows.append(sentence)
+                continue
+
+            start = 0
+            while start < len(sentence):
+                end = min(start + max_chars, len(sentence))
+                if end < len(sentence):
+                    space = sentence.rfind(' ', start, end)
+                    if space > start:
+                        end = space + 1
+                window = sentence[start:end].strip()
+                if window:
+                    windows.append(window)
+                start = end
+        return windows
+
     def _placeholder_synthesis(self, text: str, params: Dict[str, Any]) -> Tuple[np.ndarray, float]:
         """PaddleSpeech 不可用时的替代合成实现"""
+        # 合成参数一次性取出为局部变量，避免热路径上反复做字典查找
+        speed = params.get("speed", 1.0)
+        emotion = params.get("emotion", "neutral")
+        energy = params.get("energy", 1.0)
+        pitch_param = params.get("pitch", 0)
+
         # 基于文本长度和语速估计时长
         chars = len(text)
-        speed = params.get("speed", 1.0)
         chars_per_second = 5 * speed  # 假设每秒约5个汉字
         duration = max(1.0, chars / chars_per_second)
-        
-        # 创建时间数组
+
         sample_rate = 24000  # 与 PaddleSpeech 一致
-        t = np.linspace(0, duration, int(duration * sample_rate))
-        
-        # 创建基于音高参数的载波
-        pitch_param = params.get("pitch", 0)
+
+        # 基于音高参数的基频
         base_freq = 170 * (2 ** (pitch_param * 0.5))
-        carrier = np.sin(2 * np.pi * base_freq * t)
-        
-        # 添加谐波增加丰富度
-        harmonics = 0
-        for i in range(2, 6):
-            harmonics += (1/i) * np.sin(2 * np.pi * (base_freq * i) * t)
-        
+
+        # 音节数按 8Hz 包络上限封顶：语速再快，包络也不需要更细的起伏，
+        # 位置数组随时长而非字符数增长
+        syllables = min(chars, max(1, int(duration * 8)))
+
+        # numba 可用时走融合 JIT 内核：单次循环生成全部样本，不产生中间数组
+        if NUMBA_AVAILABLE:
+            syllable_positions = np.linspace(0, duration * 0.8, syllables)
+            emotion_code = _EMOTION_CODES.get(emotion, 0)
+            n = int(duration * sample_rate)
+            audio = _placeholder_kernel(
+                n, sample_rate, duration, base_freq,
+                syllable_positions, 0.15, emotion_code, energy
+            )
+            return audio, duration
+
+        # 创建时间数组，2πt 只算一次，供所有正弦项复用；
+        # 最终量化到 16 位 PCM，全程 float32 足够，带宽与 SIMD 吞吐都翻倍
+        t = np.linspace(0, duration, int(duration * sample_rate), dtype=np.float32)
+        w = np.float32(2 * np.pi) * t
+
+        # 创建载波
+        carrier = np.sin(base_freq * w)
+
+        # 添加谐波增加丰富度：广播一次算出全部谐波，避免逐个谐波扫一遍 t
+        ks = np.arange(2, 6, dtype=np.float32)
+        harmonics = ((1.0 / ks)[:, None] * np.sin(base_freq * ks[:, None] * w)).sum(axis=0)
+
         carrier = 0.7 * carrier + 0.3 * harmonics
         
         # 基于音节创建包络
-        syllables = max(1, chars)
         envelope = np.ones_like(t) * 0.1
         
-        pause_factor = params.get("pause_factor", 1.0)
         syllable_positions = np.linspace(0, duration * 0.8, syllables)
         syllable_width = 0.15
         
+        # 音节形状只算一次，按采样点区间直接写入，避免对每个音节扫描整个 t 数组
+        width = int(syllable_width * sample_rate)
+        shape = 0.5 + 0.5 * np.sin(np.linspace(0, np.pi, width, endpoint=False,
+                                               dtype=np.float32))
         for pos in syllable_positions:
-            idx = (t >= pos) & (t <= pos + syllable_width)
-            if np.any(idx):
-                envelope[idx] = 0.5 + 0.5 * np.sin(np.pi * (t[idx] - pos) / syllable_width)
+            s = int(pos * sample_rate)
+            e = s + width
+            if e <= len(envelope):
+                envelope[s:e] = shape
         
-        from scipy.ndimage import gaussian_filter1d
-        envelope = gaussian_filter1d(envelope, sigma=0.01 * sample_rate)
+        envelope = _smooth_envelope(envelope, _gauss_kernel(0.01 * sample_rate))
         
         # 应用情感风格
-        emotion = params.get("emotion", "neutral")
         if emotion == "happy":
-            modulation = 0.1 * np.sin(2 * np.pi * 3 * t / duration)
+            modulation = 0.1 * np.sin((3 / duration) * w)
             carrier = carrier + modulation
             envelope = np.power(envelope, 0.9)
         elif emotion == "sad":
-            modulation = 0.05 * np.sin(2 * np.pi * 1 * t / duration)
+            modulation = 0.05 * np.sin((1 / duration) * w)
             carrier = carrier - modulation
             envelope = np.power(envelope, 1.2)
         elif emotion == "serious":
@@ -377,32 +659,27 @@ class PaddleSpeechModel:
         audio = carrier * envelope
         
         # 应用音量
-        energy = params.get("energy", 1.0)
         audio = audio * energy
         
-        # 添加噪声以模拟辅音
-        noise = np.random.uniform(-0.05, 0.05, len(audio))
+        # 添加噪声以模拟辅音（标准差 0.029 与原 uniform(-0.05, 0.05) 一致）
+        noise = _RNG.standard_normal(len(audio), dtype=np.float32) * np.float32(0.029)
         audio = audio + noise * envelope * 0.3
         
         # 添加音高微小变化
-        tremolo = 1.0 + 0.03 * np.sin(2 * np.pi * 5 * t)
+        tremolo = 1.0 + 0.03 * np.sin(5 * w)
         audio = audio * tremolo
         
         # 添加淡入淡出
         fade_len = int(0.05 * sample_rate)
         if len(audio) > 2 * fade_len:
-            fade_in = np.linspace(0, 1, fade_len)
-            fade_out = np.linspace(1, 0, fade_len)
+            fade_in = np.linspace(0, 1, fade_len, dtype=np.float32)
+            fade_out = np.linspace(1, 0, fade_len, dtype=np.float32)
             audio[:fade_len] = audio[:fade_len] * fade_in
             audio[-fade_len:] = audio[-fade_len:] * fade_out
         
-        # 归一化
-        max_amp = np.max(np.abs(audio))
-        if max_amp > 0:
-            audio = audio / max_amp * 0.95
-        
-        # 将浮点数组转换为16位整数格式（符合大多数音频处理的要求）
-        audio = np.asarray(audio * 32767, dtype=np.int16)
+        # 归一化与 16 位整数转换合并为一次缩放：标量系数一次算好，只扫一遍数组
+        peak = max(np.max(np.abs(audio)), 1e-9)
+        audio = (audio * (0.95 * 32767 / peak)).astype(np.int16)
         
         return audio, duration
     
@@ -451,33 +728,144 @@ class PaddleSpeechModel:
             print(f"添加自定义声音失败: {e}")
             return None
 
+def _dump_task_line(task: TTSTaskDB) -> bytes:
+    record = task.model_dump(mode='json')
+    if MSGSPEC_AVAILABLE:
+        return _MSGSPEC_ENCODER.encode(record) + b'\n'
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(record) + b'\n'
+    return (json.dumps(record) + '\n').encode()
+
+# 追加单条任务记录：每次更新 O(1)，不再随任务总量增长
+async def _append_task_log(task: TTSTaskDB):
+    async with _TASKS_LOCK:
+        with open(TTS_TASKS_FILE, 'ab') as f:
+            f.write(_dump_task_line(task))
+
+# 将日志压实为每任务一行的最新状态
+async def _compact_task_log():
+    async with _TASKS_LOCK:
+        tmp_path = TTS_TASKS_FILE + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b''.join(_dump_task_line(task) for task in TTS_TASKS_DB.values()))
+        os.replace(tmp_path, TTS_TASKS_FILE)
+
+# 去抖落盘回调：一个合并窗口内的所有脏任务拼成一段，单次 append 写出
+async def _flush_tts_tasks():
+    task_ids = list(_dirty_task_ids)
+    _dirty_task_ids.clear()
+    lines = b''.join(
+        _dump_task_line(task)
+        for task in (TTS_TASKS_DB.get(task_id) for task_id in task_ids)
+        if task
+    )
+    if lines:
+        async with _TASKS_LOCK:
+            with open(TTS_TASKS_FILE, 'ab') as f:
+                f.write(lines)
+
+# 标记任务数据已变更（代替每次进度更新都全量写文件）
+def mark_tts_tasks_dirty(task_id: str):
+    _dirty_task_ids.add(task_id)
+    _tasks_flusher.mark()
+
+# 合成结果 LRU 缓存：(text, voice_id, params) 相同的请求直接复用已生成
+# 的音频文件，跳过整条合成链路；按插入序淘汰最久未用的条目
+_SYNTH_CACHE: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_SYNTH_CACHE_MAX = 256
+
+def _synthesis_cache_key(text: str, voice_id: str, params: Dict[str, Any]) -> str:
+    payload = f"{text}|{voice_id}|{json.dumps(params, sort_keys=True, default=str)}"
+    return hashlib.md5(payload.encode()).hexdigest()
+
+def _synthesis_cache_get(key: str) -> Optional[Tuple[str, float]]:
+    entry = _SYNTH_CACHE.get(key)
+    if entry is None:
+        return None
+    if not os.path.exists(entry[0]):
+        # 结果文件被清理过，缓存条目随之失效
+        del _SYNTH_CACHE[key]
+        return None
+    _SYNTH_CACHE.move_to_end(key)
+    return entry
+
+def _synthesis_cache_put(key: str, file_path: str, duration: float):
+    _SYNTH_CACHE[key] = (file_path, duration)
+    _SYNTH_CACHE.move_to_end(key)
+    while len(_SYNTH_CACHE) > _SYNTH_CACHE_MAX:
+        _SYNTH_CACHE.popitem(last=False)
+
+# 任务完成事件：调用方可 await 事件而不是轮询 get_tts_task_status，
+# 任务进入终态（completed/failed）时置位
+_TTS_EVENTS: Dict[str, asyncio.Event] = {}
+
+# 并发任务的 ID 去重计数：同一秒内创建多个任务时，时间戳+voice_id 不够区分
+_BATCH_ID_COUNTER = itertools.count()
+
+def get_tts_event(task_id: str) -> asyncio.Event:
+    event = _TTS_EVENTS.get(task_id)
+    if event is None:
+        event = _TTS_EVENTS[task_id] = asyncio.Event()
+    return event
+
 # 初始化 PaddleSpeech TTS 服务和模型
 async def init_tts_service():
-    global TTS_TASKS_DB, tts_executor, tts_online_engine
-    
+    global tts_executor, tts_online_engine
+
     # 确保目录存在
     os.makedirs(os.path.join(settings.UPLOAD_DIR, "tts_results"), exist_ok=True)
-    
-    # 加载现有任务
+
+    # 加载现有任务：回放 JSONL 日志，后写的记录覆盖先写的，保留每个任务的最新状态
     if os.path.exists(TTS_TASKS_FILE):
         try:
-            with open(TTS_TASKS_FILE, 'r') as f:
+            TTS_TASKS_DB.clear()
+            with open(TTS_TASKS_FILE, 'rb') as f:
+                for line in f:
+                    if not line.strip():
+                        continue
+                    if MSGSPEC_AVAILABLE:
+                        item = _MSGSPEC_DECODER.decode(line)
+                    elif ORJSON_AVAILABLE:
+                        item = orjson.loads(line)
+                    else:
+                        item = json.loads(line)
+                    task = TTSTaskDB(**item)
+                    TTS_TASKS_DB[task.task_id] = task
+
+            # 日志携带大量历史版本时压实一次
+            if os.path.getsize(TTS_TASKS_FILE) > _COMPACT_THRESHOLD:
+                await _compact_task_log()
+        except Exception as e:
+            print(f"初始化 TTS 服务失败: {e}")
+    elif os.path.exists(_LEGACY_TASKS_FILE):
+        # 从旧版整文件 JSON 一次性迁移
+        try:
+            with open(_LEGACY_TASKS_FILE, 'r') as f:
                 data = json.load(f)
-                TTS_TASKS_DB = [TTSTaskDB(**item) for item in data]
+            TTS_TASKS_DB.clear()
+            for item in data:
+                task = TTSTaskDB(**item)
+                TTS_TASKS_DB[task.task_id] = task
+            await _compact_task_log()
         except Exception as e:
             print(f"初始化 TTS 服务失败: {e}")
-    
-    # 初始化 PaddleSpeech TTS 模型
+
+    # 初始化 PaddleSpeech TTS 模型，并在线程中预热，避免阻塞事件循环
     tts_executor = PaddleSpeechModel()
-    
-    print("PaddleSpeech TTS 服务初始化完成")
+    await asyncio.to_thread(tts_executor.warmup)
 
-# 保存任务到文件
-async def save_tts_tasks():
-    with open(TTS_TASKS_FILE, 'w') as f:
-        # 转换为字典列表并保存
-        data = [task.dict() for task in TTS_TASKS_DB]
-        json.dump(data, f, default=str)
+    # 预热 numba 内核：首次调用触发 JIT 编译（或加载磁盘缓存），
+    # 在线程里用最小输入跑一遍，首个真实合成请求不再付编译开销
+    if NUMBA_AVAILABLE:
+        await asyncio.to_thread(
+            _placeholder_kernel, 16, 24000, 1.0, 170.0,
+            np.linspace(0.0, 0.8, 2), 0.15, 0, 1.0
+        )
+
+    # 启动保存去抖协程
+    _tasks_flusher.start()
+
+    print("PaddleSpeech TTS 服务初始化完成")
 
 # 创建 TTS 任务
 async def synthesize_speech(
@@ -493,6 +881,16 @@ async def synthesize_speech(
     
     # 创建任务记录
     task_id = f"tts_{int(time.time())}_{voice_id[:8]}"
+
+    # 命中合成缓存时直接以完成态返回，不再调度合成任务
+    cached = _synthesis_cache_get(_synthesis_cache_key(text, voice_id, params))
+    if cached is not None:
+        task = _make_cached_task(task_id, text, voice_id, params, cached)
+        TTS_TASKS_DB[task.task_id] = task
+        await _append_task_log(task)
+        get_tts_event(task_id).set()
+        return task_id
+
     task = TTSTaskDB(
         task_id=task_id,
         text=text,
@@ -504,14 +902,73 @@ async def synthesize_speech(
     )
     
     # 添加到"数据库"
-    TTS_TASKS_DB.append(task)
-    await save_tts_tasks()
+    TTS_TASKS_DB[task.task_id] = task
+    await _append_task_log(task)
     
     # 异步执行合成任务
     background_tasks.add_task(process_tts_task, task_id)
     
     return task_id
 
+# 由缓存条目构造一个直接完成的任务记录
+def _make_cached_task(task_id: str, text: str, voice_id: str,
+                      params: Dict[str, Any], cached: Tuple[str, float]) -> TTSTaskDB:
+    now = datetime.now()
+    return TTSTaskDB(
+        task_id=task_id,
+        text=text,
+        voice_id=voice_id,
+        params=params,
+        status="completed",
+        progress=1.0,
+        created_at=now,
+        updated_at=now,
+        file_path=cached[0],
+        file_verified=True,
+        duration=cached[1]
+    )
+
+# 创建 TTS 任务（协程版）：不经过 BackgroundTasks，直接在事件循环上调度，
+# 供服务内部（替换流水线、课件配音）await 使用；
+# 任务 id 追加进程内计数器后缀，同秒并发提交也不会冲突
+async def create_tts_task(
+    text: str,
+    voice_id: str,
+    params: Dict[str, Any]
+) -> str:
+    # 验证声音样本是否存在
+    voice_samples = await get_voice_samples(0, 1, None, voice_id)
+    if not voice_samples:
+        raise ValueError("声音样本不存在")
+
+    task_id = f"tts_{int(time.time())}_{voice_id[:8]}_{next(_BATCH_ID_COUNTER):04d}"
+
+    # 命中合成缓存时直接以完成态返回，不再调度合成任务
+    cached = _synthesis_cache_get(_synthesis_cache_key(text, voice_id, params))
+    if cached is not None:
+        task = _make_cached_task(task_id, text, voice_id, params, cached)
+        TTS_TASKS_DB[task.task_id] = task
+        await _append_task_log(task)
+        get_tts_event(task_id).set()
+        return task_id
+
+    task = TTSTaskDB(
+        task_id=task_id,
+        text=text,
+        voice_id=voice_id,
+        params=params,
+        status="pending",
+        progress=0.0,
+        created_at=datetime.now()
+    )
+
+    TTS_TASKS_DB[task.task_id] = task
+    await _append_task_log(task)
+
+    asyncio.create_task(process_tts_task(task_id))
+
+    return task_id
+
 # 流式语音合成
 async def synthesize_speech_streaming(
     websocket: WebSocket,
@@ -553,12 +1010,7 @@ async def process_tts_task(task_id: str):
     global tts_executor
     
     # 查找任务
-    task = None
-    for t in TTS_TASKS_DB:
-        if t.task_id == task_id:
-            task = t
-            break
-    
+    task = TTS_TASKS_DB.get(task_id)
     if not task:
         print(f"任务未找到: {task_id}")
         return
@@ -568,7 +1020,11 @@ async def process_tts_task(task_id: str):
         task.status = "processing"
         task.progress = 0.1
         task.updated_at = datetime.now()
-        await save_tts_tasks()
+        mark_tts_tasks_dirty(task_id)
+        
+        # 缓存键在参数被声音克隆调整前先算好：查询端用的是调用方的原始
+        # 参数，写入端必须用同一份，否则嵌入向量/模型路径混进键里永远不命中
+        cache_key = _synthesis_cache_key(task.text, task.voice_id, task.params)
         
         # 获取声音样本信息
         voice_samples = await get_voice_samples(0, 1, None, task.voice_id)
@@ -591,7 +1047,7 @@ async def process_tts_task(task_id: str):
         # 更新进度
         task.progress = 0.3
         task.updated_at = datetime.now()
-        await save_tts_tasks()
+        mark_tts_tasks_dirty(task_id)
         
         # 预览模式处理更快
         is_preview = task.params.get("is_preview", False)
@@ -618,7 +1074,7 @@ async def process_tts_task(task_id: str):
         # 更新进度
         task.progress = 0.7
         task.updated_at = datetime.now()
-        await save_tts_tasks()
+        mark_tts_tasks_dirty(task_id)
         
         # 预览模式更快完成
         if is_preview:
@@ -626,63 +1082,156 @@ async def process_tts_task(task_id: str):
         else:
             await asyncio.sleep(0.7)
         
-        # 更新任务状态
+        # 更新任务状态；输出文件此刻已写出，记录校验标记，
+        # 结果查询不必每次再 stat 一遍磁盘
         task.status = "completed"
         task.progress = 1.0
         task.updated_at = datetime.now()
         task.file_path = output_file
+        task.file_verified = os.path.exists(output_file)
         task.duration = duration
-        await save_tts_tasks()
-        
+        await _append_task_log(task)
+
+        # 结果进入合成缓存，后续相同 (文本, 声音, 参数) 的请求直接复用
+        if task.file_verified:
+            _synthesis_cache_put(cache_key, output_file, duration)
+
+        get_tts_event(task_id).set()
+
         print(f"TTS 任务完成: {task_id}, 文件: {output_file}")
-    
+
     except Exception as e:
         # 更新任务状态为失败
-        for t in TTS_TASKS_DB:
-            if t.task_id == task_id:
-                t.status = "failed"
-                t.error = str(e)
-                t.updated_at = datetime.now()
-                break
-        
-        await save_tts_tasks()
+        t = TTS_TASKS_DB.get(task_id)
+        if t:
+            t.status = "failed"
+            t.error = str(e)
+            t.updated_at = datetime.now()
+            await _append_task_log(t)
+        get_tts_event(task_id).set()
         print(f"TTS 任务失败: {task_id}, 错误: {e}")
 
+# 批量创建 TTS 任务：声音样本只校验一次，整批交给同一个后台任务处理
+async def synthesize_speech_batch(
+    background_tasks: BackgroundTasks,
+    texts: List[str],
+    voice_id: str,
+    params: Dict[str, Any]
+) -> List[str]:
+    # 验证声音样本是否存在
+    voice_samples = await get_voice_samples(0, 1, None, voice_id)
+    if not voice_samples:
+        raise ValueError("声音样本不存在")
+
+    task_ids = []
+    for text in texts:
+        task_id = f"tts_{int(time.time())}_{voice_id[:8]}_{next(_BATCH_ID_COUNTER):04d}"
+        task = TTSTaskDB(
+            task_id=task_id,
+            text=text,
+            voice_id=voice_id,
+            params=dict(params),
+            status="pending",
+            progress=0.0,
+            created_at=datetime.now()
+        )
+        TTS_TASKS_DB[task_id] = task
+        await _append_task_log(task)
+        task_ids.append(task_id)
+
+    background_tasks.add_task(process_tts_batch, task_ids)
+    return task_ids
+
+# 批量处理 TTS 任务：嵌入向量与参数适配整批只做一次，逐条合成
+async def process_tts_batch(task_ids: List[str]):
+    if not task_ids:
+        return
+
+    first = TTS_TASKS_DB.get(task_ids[0])
+    if not first:
+        print(f"批量任务未找到: {task_ids[0]}")
+        return
+
+    voice_id = first.voice_id
+    voice_samples = await get_voice_samples(0, 1, None, voice_id)
+    voice_sample = voice_samples[0] if voice_samples else None
+    speaker_embedding = voice_cloner.load_voice_embedding(voice_id)
+
+    output_dir = os.path.join(settings.UPLOAD_DIR, "tts_results")
+    os.makedirs(output_dir, exist_ok=True)
+
+    for task_id in task_ids:
+        task = TTS_TASKS_DB.get(task_id)
+        if not task:
+            continue
+        try:
+            task.status = "processing"
+            task.progress = 0.1
+            task.updated_at = datetime.now()
+            mark_tts_tasks_dirty(task_id)
+
+            if speaker_embedding is not None:
+                task.params = voice_cloner.adapt_tts_params(speaker_embedding,
+                                                            task.params)
+            if voice_sample is not None and getattr(voice_sample, 'model_path', None):
+                task.params['model_path'] = voice_sample.model_path
+
+            output_file = os.path.join(output_dir, f"{task_id}.wav")
+            audio, duration = tts_executor.synthesize(
+                task.text,
+                task.params,
+                speaker_embedding,
+                output_file
+            )
+
+            task.status = "completed"
+            task.progress = 1.0
+            task.updated_at = datetime.now()
+            task.file_path = output_file
+            task.duration = duration
+            await _append_task_log(task)
+            get_tts_event(task_id).set()
+        except Exception as e:
+            task.status = "failed"
+            task.error = str(e)
+            task.updated_at = datetime.now()
+            await _append_task_log(task)
+            get_tts_event(task_id).set()
+            print(f"TTS 任务失败: {task_id}, 错误: {e}")
+
+# 各任务状态对应的提示消息
+_STATUS_MESSAGES = {
+    "pending": "任务等待处理",
+    "processing": "任务处理中",
+    "completed": "任务已完成",
+    "failed": "任务处理失败",
+}
+
 # 获取任务状态
 async def get_tts_task_status(task_id: str) -> Optional[TTSTaskStatus]:
-    for task in TTS_TASKS_DB:
-        if task.task_id == task_id:
-            message = None
-            if task.status == "pending":
-                message = "任务等待处理"
-            elif task.status == "processing":
-                message = "任务处理中"
-            elif task.status == "completed":
-                message = "任务已完成"
-            elif task.status == "failed":
-                message = "任务处理失败"
-            
-            return TTSTaskStatus(
-                task_id=task.task_id,
-                status=task.status,
-                progress=task.progress,
-                created_at=task.created_at,
-                updated_at=task.updated_at,
-                message=message,
-                error=task.error,
-                duration=task.duration
-            )
-    
-    return None
+    task = TTS_TASKS_DB.get(task_id)
+    if not task:
+        return None
+
+    return TTSTaskStatus(
+        task_id=task.task_id,
+        status=task.status,
+        progress=task.progress,
+        created_at=task.created_at,
+        updated_at=task.updated_at,
+        message=_STATUS_MESSAGES.get(task.status),
+        error=task.error,
+        duration=task.duration
+    )
 
 # 获取任务结果
 async def get_tts_task_result(task_id: str) -> Optional[TTSTaskStatus]:
     status = await get_tts_task_status(task_id)
     if status and status.status == "completed":
-        # 找到对应任务获取文件路径
-        for task in TTS_TASKS_DB:
-            if task.task_id == task_id:
-                if os.path.exists(task.file_path):
-                    return status
-    
+        task = TTS_TASKS_DB.get(task_id)
+        # 完成时已校验过文件落盘，结果查询不再逐次 stat；
+        # 旧日志回放的记录没有该标记，退回一次存在性检查
+        if task and (task.file_verified or os.path.exists(task.file_path)):
+            return status
+
     return None
\ No newline at end of file
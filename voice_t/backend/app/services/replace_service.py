@@ -1,6 +1,7 @@
 import os
 import json
 import asyncio
+import itertools
 import time
 import shutil
 import numpy as np
@@ -8,20 +9,108 @@ import soundfile as sf
 import librosa
 from pathlib import Path
 from datetime import datetime
+from collections import OrderedDict
 from typing import Dict, Any, Optional, List
 from fastapi import UploadFile, BackgroundTasks
 from app.models.replace import MediaFileDB, TranscriptionTaskDB, ReplaceTaskDB, Transcription, Segment, VoiceReplaceStatus, SubtitleResponse
-from app.services.tts_service import synthesize_speech, get_tts_task_status, get_tts_task_result
+from app.services.paddlespeech_tts import create_tts_task, get_tts_task_status, get_tts_task_result, get_tts_event
 from app.core.config import settings
+from app.utils.persistence import DebouncedFlusher
+
+# orjson 序列化比标准库 json 快数倍，且原生支持 datetime，不可用时退回标准库
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# msgspec 编解码更快且复用预构建的 Encoder/Decoder，装了就优先用
+try:
+    import msgspec.json
+    _MSGSPEC_ENCODER = msgspec.json.Encoder()
+    _MSGSPEC_DECODER = msgspec.json.Decoder()
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+# numba 可用时将 VAD 的分段收尾循环编译为机器码；装不上则走纯 Python
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
 
 # 模拟数据库存储
 MEDIA_FILES_DB = []
+# file_id -> 媒体文件记录索引，供本模块和 ASR 服务做 O(1) 查找
+MEDIA_FILES_INDEX: Dict[str, MediaFileDB] = {}
 TRANSCRIPTION_TASKS_DB = []
+# task_id -> 任务记录索引，O(1) 查找
+TRANSCRIPTION_TASKS_INDEX: Dict[str, TranscriptionTaskDB] = {}
 REPLACE_TASKS_DB = []
+REPLACE_TASKS_INDEX: Dict[str, ReplaceTaskDB] = {}
 MEDIA_FILES_FILE = os.path.join(settings.UPLOAD_DIR, "media_files.json")
 TRANSCRIPTION_TASKS_FILE = os.path.join(settings.UPLOAD_DIR, "transcription_tasks.json")
 REPLACE_TASKS_FILE = os.path.join(settings.UPLOAD_DIR, "replace_tasks.json")
 
+# 已完成任务的字幕内容缓存：(task_id, 格式) -> 文件内容。
+# 字幕写盘后不再变化，可安全缓存；LRU 封顶，最久未取的条目先淘汰
+SUBTITLE_CACHE: "OrderedDict[tuple, str]" = OrderedDict()
+_SUBTITLE_CACHE_MAX = 256
+
+def _subtitle_cache_get(key: tuple) -> Optional[str]:
+    content = SUBTITLE_CACHE.get(key)
+    if content is not None:
+        SUBTITLE_CACHE.move_to_end(key)
+    return content
+
+def _subtitle_cache_put(key: tuple, content: str):
+    SUBTITLE_CACHE[key] = content
+    SUBTITLE_CACHE.move_to_end(key)
+    while len(SUBTITLE_CACHE) > _SUBTITLE_CACHE_MAX:
+        SUBTITLE_CACHE.popitem(last=False)
+
+# 模块级随机数发生器（PCG64），避免在循环里反复调用 random.choice
+_rng = np.random.default_rng()
+
+# 进程内单调递增计数器，保证同一秒内生成的 ID 也互不相同；
+# 之前用 hash(filename) % 10000 取后缀，并发上传时有 1/10000 的碰撞概率，
+# 且 hash() 每个进程随机化，无法作为稳定键
+_ID_COUNTER = itertools.count()
+
+# 保存去抖：进度更新只登记脏记录，由后台协程在合并窗口后统一追加日志
+# 键为 (快照文件, 记录 ID)，同一记录的连续更新在窗口内只落盘一次
+_dirty_records: Dict[tuple, Any] = {}
+_records_flusher = DebouncedFlusher(lambda: _flush_dirty_records(), interval=0.5)
+
+# 标记记录已变更，由去抖协程统一落盘
+def mark_record_dirty(snapshot_file: str, key: str, record):
+    # 内容已变，先丢弃该记录的序列化字节缓存，落盘时强制重新序列化，
+    # 不依赖调用方是否同时刷新了 updated_at
+    _record_bytes_cache.pop(key, None)
+    _dirty_records[(snapshot_file, key)] = record
+    _records_flusher.mark()
+
+# 去抖落盘回调：把合并窗口内登记的脏记录逐条追加到对应日志
+async def _flush_dirty_records():
+    pending = list(_dirty_records.items())
+    _dirty_records.clear()
+    for (snapshot_file, _), record in pending:
+        await _append_journal(snapshot_file, record)
+
+# 加载一份快照并回放其日志，供启动时在线程池中并发调用
+def _load_snapshot(snapshot_file: str, model_cls, key_attr: str) -> list:
+    if not os.path.exists(snapshot_file):
+        return []
+    try:
+        with open(snapshot_file, 'rb') as f:
+            records = [model_cls(**item) for item in _load_records(f.read())]
+        _replay_journal(snapshot_file, records, model_cls, key_attr)
+        return records
+    except Exception as e:
+        print(f"加载持久化记录失败 {snapshot_file}: {e}")
+        return []
+
 # 初始化函数
 async def init_replace_service():
     global MEDIA_FILES_DB, TRANSCRIPTION_TASKS_DB, REPLACE_TASKS_DB
@@ -29,50 +118,154 @@ async def init_replace_service():
     os.makedirs(os.path.join(settings.UPLOAD_DIR, "transcriptions"), exist_ok=True)
     os.makedirs(os.path.join(settings.UPLOAD_DIR, "replaced_media"), exist_ok=True)
     
-    if os.path.exists(MEDIA_FILES_FILE):
-        try:
-            with open(MEDIA_FILES_FILE, 'r') as f:
-                data = json.load(f)
-                MEDIA_FILES_DB = [MediaFileDB(**item) for item in data]
-        except Exception as e:
-            print(f"初始化媒体文件服务失败: {e}")
-    
-    if os.path.exists(TRANSCRIPTION_TASKS_FILE):
-        try:
-            with open(TRANSCRIPTION_TASKS_FILE, 'r') as f:
-                data = json.load(f)
-                TRANSCRIPTION_TASKS_DB = [TranscriptionTaskDB(**item) for item in data]
-        except Exception as e:
-            print(f"初始化转写任务服务失败: {e}")
-    
-    if os.path.exists(REPLACE_TASKS_FILE):
-        try:
-            with open(REPLACE_TASKS_FILE, 'r') as f:
-                data = json.load(f)
-                REPLACE_TASKS_DB = [ReplaceTaskDB(**item) for item in data]
-        except Exception as e:
-            print(f"初始化替换任务服务失败: {e}")
+    # 三个快照互不依赖，放到线程池并发加载，冷启动耗时约为最慢一个文件
+    MEDIA_FILES_DB, TRANSCRIPTION_TASKS_DB, REPLACE_TASKS_DB = await asyncio.gather(
+        asyncio.to_thread(_load_snapshot, MEDIA_FILES_FILE, MediaFileDB, "file_id"),
+        asyncio.to_thread(_load_snapshot, TRANSCRIPTION_TASKS_FILE,
+                          TranscriptionTaskDB, "task_id"),
+        asyncio.to_thread(_load_snapshot, REPLACE_TASKS_FILE, ReplaceTaskDB, "task_id"),
+    )
+    MEDIA_FILES_INDEX.clear()
+    MEDIA_FILES_INDEX.update((mf.file_id, mf) for mf in MEDIA_FILES_DB)
+    TRANSCRIPTION_TASKS_INDEX.clear()
+    TRANSCRIPTION_TASKS_INDEX.update((t.task_id, t) for t in TRANSCRIPTION_TASKS_DB)
+    REPLACE_TASKS_INDEX.clear()
+    REPLACE_TASKS_INDEX.update((t.task_id, t) for t in REPLACE_TASKS_DB)
+
+    # 启动保存去抖协程
+    _records_flusher.start()
+
+# 每个快照文件对应的记录主键字段
+_KEY_ATTR_BY_FILE = {
+    MEDIA_FILES_FILE: "file_id",
+    TRANSCRIPTION_TASKS_FILE: "task_id",
+    REPLACE_TASKS_FILE: "task_id",
+}
+
+# 单条记录的序列化字节缓存：键为记录主键，值为 (updated_at, bytes)。
+# 每次标记脏或单条持久化时都会显式弹出对应条目，确保改过的记录一定重新
+# 序列化；updated_at 只作为兜底校验，全量快照只需重排未变过的记录
+_record_bytes_cache: Dict[str, tuple] = {}
+
+def _encode_item(item) -> bytes:
+    if MSGSPEC_AVAILABLE:
+        return _MSGSPEC_ENCODER.encode(item)
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(item)
+    return json.dumps(item).encode()
+
+def _record_bytes(record, key_attr: str) -> bytes:
+    key = getattr(record, key_attr)
+    stamp = getattr(record, "updated_at", None)
+    cached = _record_bytes_cache.get(key)
+    if cached is not None and stamp is not None and cached[0] == stamp:
+        return cached[1]
+    raw = _encode_item(record.model_dump(mode='json'))
+    _record_bytes_cache[key] = (stamp, raw)
+    return raw
+
+# 序列化记录列表：逐条取缓存字节后拼接，未变动的记录不再重走
+# model_dump；orjson/msgspec 在 Rust/C 层直接编码 UTF-8 字节
+def _dump_records(records, key_attr: str) -> bytes:
+    return b"[" + b",".join(_record_bytes(r, key_attr) for r in records) + b"]"
+
+def _load_records(raw: bytes):
+    if MSGSPEC_AVAILABLE:
+        return _MSGSPEC_DECODER.decode(raw)
+    return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+# 追加式日志：进度更新只追加被改动的那条记录，写入量为 O(1)；
+# 终态时写全量快照并截断日志（压实），启动时先载快照再回放日志
+_JOURNAL_SUFFIX = ".journal"
+
+def _dump_record_line(record, key_attr: str) -> bytes:
+    return _record_bytes(record, key_attr) + b'\n'
+
+def _append_journal_sync(snapshot_file: str, line: bytes):
+    with open(snapshot_file + _JOURNAL_SUFFIX, 'ab') as f:
+        f.write(line)
+
+async def _append_journal(snapshot_file: str, record):
+    # 磁盘写放到线程池执行，避免阻塞事件循环；序列化仍在调用方协程内完成
+    line = _dump_record_line(record, _KEY_ATTR_BY_FILE[snapshot_file])
+    await asyncio.to_thread(_append_journal_sync, snapshot_file, line)
+
+def _truncate_journal(snapshot_file: str):
+    journal_path = snapshot_file + _JOURNAL_SUFFIX
+    if os.path.exists(journal_path):
+        os.remove(journal_path)
+
+def _replay_journal(snapshot_file: str, records: list, model_cls, key_attr: str):
+    """将日志中的记录应用到快照之上，后写的版本覆盖先写的"""
+    journal_path = snapshot_file + _JOURNAL_SUFFIX
+    if not os.path.exists(journal_path):
+        return records
+
+    index = {getattr(r, key_attr): i for i, r in enumerate(records)}
+    try:
+        with open(journal_path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                record = model_cls(**_load_records(line))
+                key = getattr(record, key_attr)
+                if key in index:
+                    records[index[key]] = record
+                else:
+                    index[key] = len(records)
+                    records.append(record)
+    except Exception as e:
+        print(f"回放持久化日志失败: {e}")
+    return records
+
+# 保存到文件（全量快照，同时截断对应日志完成压实）
+def _write_snapshot_sync(snapshot_file: str, payload: bytes):
+    with open(snapshot_file, 'wb') as f:
+        f.write(payload)
+    _truncate_journal(snapshot_file)
 
-# 保存到文件
 async def save_media_files_db():
-    with open(MEDIA_FILES_FILE, 'w') as f:
-        data = [item.dict() for item in MEDIA_FILES_DB]
-        json.dump(data, f, default=str)
+    await asyncio.to_thread(_write_snapshot_sync, MEDIA_FILES_FILE,
+                            _dump_records(MEDIA_FILES_DB, "file_id"))
 
 async def save_transcription_tasks_db():
-    with open(TRANSCRIPTION_TASKS_FILE, 'w') as f:
-        data = [item.dict() for item in TRANSCRIPTION_TASKS_DB]
-        json.dump(data, f, default=str)
+    await asyncio.to_thread(_write_snapshot_sync, TRANSCRIPTION_TASKS_FILE,
+                            _dump_records(TRANSCRIPTION_TASKS_DB, "task_id"))
 
 async def save_replace_tasks_db():
-    with open(REPLACE_TASKS_FILE, 'w') as f:
-        data = [item.dict() for item in REPLACE_TASKS_DB]
-        json.dump(data, f, default=str)
+    await asyncio.to_thread(_write_snapshot_sync, REPLACE_TASKS_FILE,
+                            _dump_records(REPLACE_TASKS_DB, "task_id"))
+
+# 单条记录持久化：只把这一条追加到日志，写入量 O(1)，不再随任务
+# 总数线性增长；日志超过阈值时才重写一次全量快照完成压实
+_COMPACT_THRESHOLD = 1 << 20  # 1MB
+
+async def _persist_record(snapshot_file: str, record, save_db):
+    # 直接持久化同样意味着记录刚被改过，先使其字节缓存失效
+    _record_bytes_cache.pop(getattr(record, _KEY_ATTR_BY_FILE[snapshot_file]), None)
+    await _append_journal(snapshot_file, record)
+    try:
+        if os.path.getsize(snapshot_file + _JOURNAL_SUFFIX) > _COMPACT_THRESHOLD:
+            await save_db()
+    except OSError:
+        pass
+
+# 转写任务库的唯一持久化入口：paddlespeech_asr 等协作模块通过这组助手
+# 读写同一份任务库，避免两个模块各自用不同格式重写同一个快照文件
+def add_transcription_task(task: TranscriptionTaskDB):
+    TRANSCRIPTION_TASKS_DB.append(task)
+    TRANSCRIPTION_TASKS_INDEX[task.task_id] = task
+
+def mark_transcription_task_dirty(task: TranscriptionTaskDB):
+    mark_record_dirty(TRANSCRIPTION_TASKS_FILE, task.task_id, task)
+
+async def persist_transcription_task(task: TranscriptionTaskDB):
+    await _persist_record(TRANSCRIPTION_TASKS_FILE, task, save_transcription_tasks_db)
 
 # 上传媒体文件
 async def upload_media(file: UploadFile, name: str) -> str:
     # 生成唯一文件ID
-    file_id = f"media_{int(time.time())}_{hash(file.filename) % 10000:04d}"
+    file_id = f"media_{int(time.time())}_{next(_ID_COUNTER):06d}"
     
     # 创建存储目录
     media_dir = os.path.join(settings.UPLOAD_DIR, "media")
@@ -81,14 +274,13 @@ async def upload_media(file: UploadFile, name: str) -> str:
     # 保存文件
     file_path = os.path.join(media_dir, f"{file_id}_{file.filename}")
     
-    # 获取文件大小
-    file.file.seek(0, 2)  # 移到文件末尾
-    file_size = file.file.tell()  # 获取位置（即文件大小）
-    file.file.seek(0)  # 回到文件开始
-    
-    # 写入文件
+    # 分块异步读取并写入，避免同步整文件拷贝阻塞事件循环；
+    # 边写边计数文件大小，省去 seek/tell 往返
+    file_size = 0
     with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+        while chunk := await file.read(1 << 20):
+            buffer.write(chunk)
+            file_size += len(chunk)
     
     # 判断是否为视频文件
     is_video = file.content_type.startswith("video/")
@@ -107,10 +299,37 @@ async def upload_media(file: UploadFile, name: str) -> str:
     
     # 添加到"数据库"
     MEDIA_FILES_DB.append(media_file)
-    await save_media_files_db()
+    MEDIA_FILES_INDEX[file_id] = media_file
+    await _persist_record(MEDIA_FILES_FILE, media_file, save_media_files_db)
     
     return file_id
 
+
+# VAD 收尾：把掩码边界换算成时间区间并按 max_duration 切分。
+# cache=True 把编译结果落盘，进程重启不用再预热
+if NUMBA_AVAILABLE:
+    @njit(cache=True)
+    def _split_vad_runs(starts, ends, last_idx, hop_dur,
+                        min_duration, max_duration):
+        cap = starts.size + int(last_idx * hop_dur / max_duration) + 1
+        out_start = np.empty(cap, np.float64)
+        out_end = np.empty(cap, np.float64)
+        k = 0
+        for j in range(starts.size):
+            seg_start = starts[j] * hop_dur
+            e = ends[j] if ends[j] < last_idx else last_idx
+            seg_end = e * hop_dur
+            while seg_end - seg_start >= max_duration:
+                out_start[k] = seg_start
+                out_end[k] = seg_start + max_duration
+                k += 1
+                seg_start += max_duration
+            if seg_end - seg_start >= min_duration:
+                out_start[k] = seg_start
+                out_end[k] = seg_end
+                k += 1
+        return out_start[:k], out_end[:k]
+
 # 语音活动检测 (VAD)
 def detect_speech_segments(y, sr, threshold=0.01, min_duration=0.5, max_duration=10.0):
     """
@@ -120,38 +339,51 @@ def detect_speech_segments(y, sr, threshold=0.01, min_duration=0.5, max_duration
     # 计算短时帧能量
     frame_length = int(0.025 * sr)  # 25ms帧
     hop_length = int(0.010 * sr)    # 10ms跳步
-    
-    # 计算RMS能量
-    rms = librosa.feature.rms(y=y, frame_length=frame_length, hop_length=hop_length)[0]
-    
+
+    # 计算RMS能量：能量前缀和把每帧开销从 O(frame_length) 降为 O(1)，
+    # 对重叠帧同样适用；累加用 float64 避免长音频的精度漂移
+    if y.size < frame_length:
+        return []
+    y32 = y.astype(np.float32, copy=False)
+    energy_cumsum = np.empty(y32.size + 1, dtype=np.float64)
+    energy_cumsum[0] = 0.0
+    np.cumsum(np.square(y32, dtype=np.float64), out=energy_cumsum[1:])
+    frame_starts = np.arange(0, y32.size - frame_length + 1, hop_length)
+    window_sums = (energy_cumsum[frame_starts + frame_length]
+                   - energy_cumsum[frame_starts])
+    rms = np.sqrt(window_sums / frame_length).astype(np.float32)
+
     # 计算时间点
-    times = librosa.times_like(rms, sr=sr, hop_length=hop_length)
+    times = np.arange(rms.size) * (hop_length / sr)
     
     # 使用自适应阈值
     adaptive_threshold = threshold * np.mean(rms)
-    
-    # 寻找语音片段
+
+    # 寻找语音片段：布尔掩码差分一次性找出所有起止边界，
+    # 取代逐帧的 Python 状态机
+    mask = rms > adaptive_threshold
+    edges = np.diff(np.r_[np.int8(0), mask.view(np.int8), np.int8(0)])
+    starts = np.where(edges == 1)[0]
+    ends = np.where(edges == -1)[0]
+
+    hop_dur = hop_length / sr
+    if NUMBA_AVAILABLE:
+        out_start, out_end = _split_vad_runs(
+            starts, ends, rms.size - 1, hop_dur, min_duration, max_duration
+        )
+        return list(zip(out_start.tolist(), out_end.tolist()))
+
     segments = []
-    in_speech = False
-    speech_start = 0
-    
-    for i, energy in enumerate(rms):
-        current_time = times[i]
-        
-        if not in_speech and energy > adaptive_threshold:
-            # 开始新的语音片段
-            in_speech = True
-            speech_start = current_time
-        elif in_speech and (energy <= adaptive_threshold or current_time - speech_start >= max_duration):
-            # 结束当前语音片段
-            if current_time - speech_start >= min_duration:
-                segments.append((speech_start, current_time))
-            in_speech = False
-    
-    # 处理最后一个片段
-    if in_speech and times[-1] - speech_start >= min_duration:
-        segments.append((speech_start, times[-1]))
-    
+    for s, e in zip(starts, ends):
+        seg_start = s * hop_dur
+        seg_end = min(e, rms.size - 1) * hop_dur
+        # 超过最大时长的连续段按上限切开
+        while seg_end - seg_start >= max_duration:
+            segments.append((seg_start, seg_start + max_duration))
+            seg_start += max_duration
+        if seg_end - seg_start >= min_duration:
+            segments.append((seg_start, seg_end))
+
     return segments
 
 # 生成更现实的转写文本
@@ -198,29 +430,30 @@ def generate_realistic_transcription(name, duration, segments):
     
     if not selected_topic:
         # 如果没有匹配到，随机选择一个主题
-        import random
-        selected_topic = random.choice(topics)
-    
+        selected_topic = topics[_rng.integers(len(topics))]
+
+    # 主题对应的方面列表与循环无关，提到循环外
+    topic_aspects = aspects.get(selected_topic, aspects["教育"])
+
+    # 一次性抽好全部模板/方面索引，循环内只做格式化；
+    # aspect2 与 aspect1 重合时顺移一位保证二者不同
+    n = len(segments)
+    t_idx = _rng.integers(0, len(sentence_templates), n)
+    a_idx = _rng.integers(0, len(topic_aspects), n)
+    a2_idx = _rng.integers(0, len(topic_aspects), n)
+    a2_idx = np.where(a2_idx == a_idx, (a2_idx + 1) % len(topic_aspects), a2_idx)
+
     # 为每个语音片段生成一段转写文本
     transcription_segments = []
-    
+
     for i, (start, end) in enumerate(segments):
-        # 选择句子模板
-        import random
-        template = random.choice(sentence_templates)
-        
-        # 选择方面
-        topic_aspects = aspects.get(selected_topic, aspects["教育"])
-        aspect1 = random.choice(topic_aspects)
-        aspect2 = random.choice([a for a in topic_aspects if a != aspect1])
-        
         # 生成文本
-        text = template.format(
+        text = sentence_templates[t_idx[i]].format(
             topic=selected_topic,
-            aspect=aspect1,
-            aspect2=aspect2
+            aspect=topic_aspects[a_idx[i]],
+            aspect2=topic_aspects[a2_idx[i]]
         )
-        
+
         # 添加到转写片段
         transcription_segments.append(Segment(
             start=start,
@@ -237,17 +470,12 @@ def generate_realistic_transcription(name, duration, segments):
 # 转写媒体文件
 async def transcribe_media(background_tasks: BackgroundTasks, file_id: str) -> str:
     # 查找媒体文件
-    media_file = None
-    for mf in MEDIA_FILES_DB:
-        if mf.file_id == file_id:
-            media_file = mf
-            break
-    
+    media_file = MEDIA_FILES_INDEX.get(file_id)
     if not media_file:
         raise ValueError("媒体文件未找到")
     
     # 创建转写任务
-    task_id = f"transcribe_{int(time.time())}_{file_id[-6:]}"
+    task_id = f"transcribe_{int(time.time())}_{next(_ID_COUNTER):06d}"
     task = TranscriptionTaskDB(
         task_id=task_id,
         file_id=file_id,
@@ -259,101 +487,97 @@ async def transcribe_media(background_tasks: BackgroundTasks, file_id: str) -> s
     
     # 添加到"数据库"
     TRANSCRIPTION_TASKS_DB.append(task)
-    await save_transcription_tasks_db()
+    TRANSCRIPTION_TASKS_INDEX[task_id] = task
+    await _persist_record(TRANSCRIPTION_TASKS_FILE, task, save_transcription_tasks_db)
     
     # 异步处理任务
     background_tasks.add_task(process_transcription_task, task_id)
     
     return task_id
 
+# 格式化字幕时间码：一次 divmod 链取代重复的取模/除法对
+# sep 为秒与毫秒的分隔符（SRT 用 ","，VTT 用 "."）
+def _format_timecode(t: float, sep: str) -> str:
+    ms = int(t * 1000)
+    s, ms = divmod(ms, 1000)
+    m, s = divmod(s, 60)
+    h, m = divmod(m, 60)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
 # 处理转写任务
 async def process_transcription_task(task_id: str):
     # 查找任务
-    task = None
-    for t in TRANSCRIPTION_TASKS_DB:
-        if t.task_id == task_id:
-            task = t
-            break
-    
+    task = TRANSCRIPTION_TASKS_INDEX.get(task_id)
     if not task:
         print(f"任务未找到: {task_id}")
         return
-    
+
     try:
         # 查找媒体文件
-        media_file = None
-        for mf in MEDIA_FILES_DB:
-            if mf.file_id == task.file_id:
-                media_file = mf
-                break
-        
+        media_file = MEDIA_FILES_INDEX.get(task.file_id)
         if not media_file:
             raise ValueError(f"媒体文件未找到: {task.file_id}")
-        
+
         # 更新状态
-        for i, t in enumerate(TRANSCRIPTION_TASKS_DB):
-            if t.task_id == task_id:
-                TRANSCRIPTION_TASKS_DB[i].status = "processing"
-                TRANSCRIPTION_TASKS_DB[i].progress = 0.1
-                TRANSCRIPTION_TASKS_DB[i].updated_at = datetime.now()
-                break
-        
-        await save_transcription_tasks_db()
+        task.status = "processing"
+        task.progress = 0.1
+        task.updated_at = datetime.now()
+
+        mark_record_dirty(TRANSCRIPTION_TASKS_FILE, task.task_id, task)
         
         # 创建输出目录
         output_dir = os.path.join(settings.UPLOAD_DIR, "transcriptions")
         os.makedirs(output_dir, exist_ok=True)
         
-        # 模拟转写过程 - 加载音频文件
+        # 模拟转写过程 - 加载音频文件。
+        # 同一媒体重复转写时直接复用记录里缓存的 VAD 结果，跳过解码和检测
+        if media_file.vad_segments and media_file.duration:
+            duration = media_file.duration
+            segments = [tuple(seg) for seg in media_file.vad_segments]
+        else:
+            segments = None
         try:
-            # 读取音频文件
-            y, sr = librosa.load(media_file.file_path, sr=None)
-            duration = librosa.get_duration(y=y, sr=sr)
+            if segments is None:
+                # 读取音频文件：VAD 只看能量包络，16kHz 单声道足够，
+                # 用最快的 soxr_qq 重采样，免去按原始采样率解码全量数据；
+                # 真实时长从文件头读取，不依赖降采样后的样本数
+                duration = librosa.get_duration(path=media_file.file_path)
+                y, sr = librosa.load(media_file.file_path, sr=16000,
+                                     mono=True, res_type='soxr_qq')
+                segments = detect_speech_segments(y, sr)
+                media_file.vad_segments = [list(seg) for seg in segments]
         except Exception as e:
             # 如果无法读取音频，使用估计的持续时间
             print(f"无法加载音频，使用估计时长: {e}")
             duration = media_file.file_size / (500 * 1024)  # 估计时长
             
-            # 生成随机片段
-            import random
+            # 生成随机片段：片段长度只算一次，按索引铺开
             num_segments = max(3, int(duration / 10))
-            segments = []
-            
-            for i in range(num_segments):
-                start = i * (duration / num_segments)
-                end = (i + 1) * (duration / num_segments) - 0.2  # 留出一点间隔
-                segments.append((start, end))
+            seg_len = duration / num_segments
+            segments = [(i * seg_len, (i + 1) * seg_len - 0.2)  # 留出一点间隔
+                        for i in range(num_segments)]
         else:
-            # 成功加载了音频，使用VAD检测语音片段
-            segments = detect_speech_segments(y, sr)
-            
             if not segments:
                 # 如果没有检测到片段，创建一些模拟片段
                 num_segments = max(3, int(duration / 10))
-                segments = []
-                
-                for i in range(num_segments):
-                    start = i * (duration / num_segments)
-                    end = (i + 1) * (duration / num_segments) - 0.2  # 留出一点间隔
-                    segments.append((start, end))
+                seg_len = duration / num_segments
+                segments = [(i * seg_len, (i + 1) * seg_len - 0.2)  # 留出一点间隔
+                            for i in range(num_segments)]
         
+        # 同一阶段的两次更新共用一个时间戳，省去重复的 datetime.now()
+        now = datetime.now()
+
         # 更新媒体文件的时长
-        for i, mf in enumerate(MEDIA_FILES_DB):
-            if mf.file_id == media_file.file_id:
-                MEDIA_FILES_DB[i].duration = duration
-                MEDIA_FILES_DB[i].updated_at = datetime.now()
-                break
-        
-        await save_media_files_db()
-        
+        media_file.duration = duration
+        media_file.updated_at = now
+
+        mark_record_dirty(MEDIA_FILES_FILE, media_file.file_id, media_file)
+
         # 更新进度
-        for i, t in enumerate(TRANSCRIPTION_TASKS_DB):
-            if t.task_id == task_id:
-                TRANSCRIPTION_TASKS_DB[i].progress = 0.3
-                TRANSCRIPTION_TASKS_DB[i].updated_at = datetime.now()
-                break
-        
-        await save_transcription_tasks_db()
+        task.progress = 0.3
+        task.updated_at = now
+
+        mark_record_dirty(TRANSCRIPTION_TASKS_FILE, task.task_id, task)
         
         # 模拟处理时间
         await asyncio.sleep(2.0)
@@ -362,89 +586,67 @@ async def process_transcription_task(task_id: str):
         transcription = generate_realistic_transcription(media_file.name, duration, segments)
         
         # 更新进度
-        for i, t in enumerate(TRANSCRIPTION_TASKS_DB):
-            if t.task_id == task_id:
-                TRANSCRIPTION_TASKS_DB[i].progress = 0.7
-                TRANSCRIPTION_TASKS_DB[i].updated_at = datetime.now()
-                break
-        
-        await save_transcription_tasks_db()
+        task.progress = 0.7
+        task.updated_at = datetime.now()
+
+        mark_record_dirty(TRANSCRIPTION_TASKS_FILE, task.task_id, task)
         
-        # 生成SRT字幕文件
+        # 生成SRT/VTT字幕文件：单次遍历同时构建两种格式，
+        # 在内存中拼好整个文件后一次性写出，避免循环内大量小 write 调用
+        srt_parts = []
+        vtt_parts = ["WEBVTT\n\n"]
+        for i, segment in enumerate(transcription.segments):
+            # 每个端点只格式化一次；SRT 的 HH:MM:SS,mmm 由 VTT 的
+            # HH:MM:SS.mmm 替换分隔符得到，时间码只含一个 "."
+            timecodes = (f"{_format_timecode(segment.start, '.')} --> "
+                         f"{_format_timecode(segment.end, '.')}")
+            srt_parts.append(
+                f"{i+1}\n{timecodes.replace('.', ',')}\n{segment.text}\n\n"
+            )
+            vtt_parts.append(f"{timecodes}\n{segment.text}\n\n")
+
+        srt_content = "".join(srt_parts)
+        vtt_content = "".join(vtt_parts)
+
+        def _write_subtitles_sync(srt_path: str, vtt_path: str):
+            with open(srt_path, "w", encoding="utf-8") as f:
+                f.write(srt_content)
+            with open(vtt_path, "w", encoding="utf-8") as f:
+                f.write(vtt_content)
+
         srt_path = os.path.join(output_dir, f"{task_id}.srt")
-        with open(srt_path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(transcription.segments):
-                f.write(f"{i+1}\n")
-                
-                # 格式化时间码 (HH:MM:SS,mmm)
-                start_h = int(segment.start / 3600)
-                start_m = int((segment.start % 3600) / 60)
-                start_s = int(segment.start % 60)
-                start_ms = int((segment.start % 1) * 1000)
-                
-                end_h = int(segment.end / 3600)
-                end_m = int((segment.end % 3600) / 60)
-                end_s = int(segment.end % 60)
-                end_ms = int((segment.end % 1) * 1000)
-                
-                time_str = f"{start_h:02d}:{start_m:02d}:{start_s:02d},{start_ms:03d} --> "
-                time_str += f"{end_h:02d}:{end_m:02d}:{end_s:02d},{end_ms:03d}"
-                
-                f.write(f"{time_str}\n")
-                f.write(f"{segment.text}\n\n")
-        
-        # 生成VTT字幕文件
         vtt_path = os.path.join(output_dir, f"{task_id}.vtt")
-        with open(vtt_path, "w", encoding="utf-8") as f:
-            f.write("WEBVTT\n\n")
-            
-            for i, segment in enumerate(transcription.segments):
-                # 格式化时间码 (HH:MM:SS.mmm)
-                start_h = int(segment.start / 3600)
-                start_m = int((segment.start % 3600) / 60)
-                start_s = int(segment.start % 60)
-                start_ms = int((segment.start % 1) * 1000)
-                
-                end_h = int(segment.end / 3600)
-                end_m = int((segment.end % 3600) / 60)
-                end_s = int(segment.end % 60)
-                end_ms = int((segment.end % 1) * 1000)
-                
-                time_str = f"{start_h:02d}:{start_m:02d}:{start_s:02d}.{start_ms:03d} --> "
-                time_str += f"{end_h:02d}:{end_m:02d}:{end_s:02d}.{end_ms:03d}"
-                
-                f.write(f"{time_str}\n")
-                f.write(f"{segment.text}\n\n")
+        await asyncio.to_thread(_write_subtitles_sync, srt_path, vtt_path)
+
+        # 内容已在内存中，顺手填入字幕缓存，状态轮询读字幕时免去磁盘读
+        _subtitle_cache_put((task_id, "srt"), srt_content)
+        _subtitle_cache_put((task_id, "vtt"), vtt_content)
         
         # 模拟处理时间
         await asyncio.sleep(1.0)
         
         # 更新任务状态
-        for i, t in enumerate(TRANSCRIPTION_TASKS_DB):
-            if t.task_id == task_id:
-                TRANSCRIPTION_TASKS_DB[i].status = "completed"
-                TRANSCRIPTION_TASKS_DB[i].progress = 1.0
-                TRANSCRIPTION_TASKS_DB[i].updated_at = datetime.now()
-                TRANSCRIPTION_TASKS_DB[i].transcription = transcription
-                TRANSCRIPTION_TASKS_DB[i].subtitles_path = {
-                    "srt": srt_path,
-                    "vtt": vtt_path
-                }
-                break
-        
-        await save_transcription_tasks_db()
+        task.status = "completed"
+        task.progress = 1.0
+        task.updated_at = datetime.now()
+        task.transcription = transcription
+        task.subtitles_path = {
+            "srt": srt_path,
+            "vtt": vtt_path
+        }
+
+        await _persist_record(TRANSCRIPTION_TASKS_FILE, task,
+                              save_transcription_tasks_db)
         print(f"转写任务完成: {task_id}")
-        
+
     except Exception as e:
         # 更新任务状态为失败
-        for i, t in enumerate(TRANSCRIPTION_TASKS_DB):
-            if t.task_id == task_id:
-                TRANSCRIPTION_TASKS_DB[i].status = "failed"
-                TRANSCRIPTION_TASKS_DB[i].error = str(e)
-                TRANSCRIPTION_TASKS_DB[i].updated_at = datetime.now()
-                break
-        
-        await save_transcription_tasks_db()
+        task.status = "failed"
+        task.error = str(e)
+        task.updated_at = datetime.now()
+
+        await _persist_record(TRANSCRIPTION_TASKS_FILE, task,
+                              save_transcription_tasks_db)
         print(f"转写任务失败: {task_id}, 错误: {e}")
 
 # 替换声音
@@ -455,12 +657,7 @@ async def replace_voice(
     speed: float = 1.0
 ) -> str:
     # 查找转写任务
-    transcription_task = None
-    for tt in TRANSCRIPTION_TASKS_DB:
-        if tt.task_id == transcription_task_id:
-            transcription_task = tt
-            break
-    
+    transcription_task = TRANSCRIPTION_TASKS_INDEX.get(transcription_task_id)
     if not transcription_task:
         raise ValueError("转写任务未找到")
     
@@ -468,7 +665,7 @@ async def replace_voice(
         raise ValueError(f"转写任务状态 {transcription_task.status} 不是 completed")
     
     # 创建替换任务
-    task_id = f"replace_{int(time.time())}_{transcription_task_id[-6:]}"
+    task_id = f"replace_{int(time.time())}_{next(_ID_COUNTER):06d}"
     task = ReplaceTaskDB(
         task_id=task_id,
         transcription_task_id=transcription_task_id,
@@ -482,7 +679,8 @@ async def replace_voice(
     
     # 添加到"数据库"
     REPLACE_TASKS_DB.append(task)
-    await save_replace_tasks_db()
+    REPLACE_TASKS_INDEX[task_id] = task
+    await _persist_record(REPLACE_TASKS_FILE, task, save_replace_tasks_db)
     
     # 异步处理任务
     background_tasks.add_task(process_replace_task, task_id)
@@ -492,46 +690,28 @@ async def replace_voice(
 # 处理替换任务
 async def process_replace_task(task_id: str):
     # 查找任务
-    task = None
-    for t in REPLACE_TASKS_DB:
-        if t.task_id == task_id:
-            task = t
-            break
-    
+    task = REPLACE_TASKS_INDEX.get(task_id)
     if not task:
         print(f"任务未找到: {task_id}")
         return
-    
+
     try:
         # 查找转写任务
-        transcription_task = None
-        for tt in TRANSCRIPTION_TASKS_DB:
-            if tt.task_id == task.transcription_task_id:
-                transcription_task = tt
-                break
-        
+        transcription_task = TRANSCRIPTION_TASKS_INDEX.get(task.transcription_task_id)
         if not transcription_task:
             raise ValueError(f"转写任务未找到: {task.transcription_task_id}")
-        
+
         # 查找媒体文件
-        media_file = None
-        for mf in MEDIA_FILES_DB:
-            if mf.file_id == transcription_task.file_id:
-                media_file = mf
-                break
-        
+        media_file = MEDIA_FILES_INDEX.get(transcription_task.file_id)
         if not media_file:
             raise ValueError(f"媒体文件未找到: {transcription_task.file_id}")
-        
+
         # 更新状态
-        for i, t in enumerate(REPLACE_TASKS_DB):
-            if t.task_id == task_id:
-                REPLACE_TASKS_DB[i].status = "processing"
-                REPLACE_TASKS_DB[i].progress = 0.1
-                REPLACE_TASKS_DB[i].updated_at = datetime.now()
-                break
-        
-        await save_replace_tasks_db()
+        task.status = "processing"
+        task.progress = 0.1
+        task.updated_at = datetime.now()
+
+        mark_record_dirty(REPLACE_TASKS_FILE, task.task_id, task)
         
         # 创建输出目录
         output_dir = os.path.join(settings.UPLOAD_DIR, "replaced_media")
@@ -545,12 +725,9 @@ async def process_replace_task(task_id: str):
         output_path = os.path.join(output_dir, f"{task_id}_{output_filename}")
         
         # 更新任务输出文件名
-        for i, t in enumerate(REPLACE_TASKS_DB):
-            if t.task_id == task_id:
-                REPLACE_TASKS_DB[i].output_filename = output_filename
-                break
-        
-        await save_replace_tasks_db()
+        task.output_filename = output_filename
+
+        mark_record_dirty(REPLACE_TASKS_FILE, task.task_id, task)
         
         # 获取转写结果
         transcription = transcription_task.transcription
@@ -566,78 +743,70 @@ async def process_replace_task(task_id: str):
             "pause_factor": 1.0
         }
         
-        # 为每个转写片段生成语音
-        tts_results = []
+        # 为每个转写片段生成语音：片段相互独立，用有界并发重叠执行，
+        # 整体耗时从逐段串行降为受信号量限制的流水线
         total_segments = len(transcription.segments)
-        
-        for i, segment in enumerate(transcription.segments):
-            # 更新进度
-            progress = 0.1 + 0.7 * ((i + 1) / total_segments)
-            for j, t in enumerate(REPLACE_TASKS_DB):
-                if t.task_id == task_id:
-                    REPLACE_TASKS_DB[j].progress = progress
-                    REPLACE_TASKS_DB[j].updated_at = datetime.now()
-                    break
-            
-            await save_replace_tasks_db()
-            
-            # 提交TTS任务
-            try:
-                # 使用临时的BackgroundTasks对象，因为我们需要等待TTS完成
-                temp_bg_tasks = BackgroundTasks()
-                tts_task_id = await synthesize_speech(
-                    temp_bg_tasks, 
-                    segment.text, 
-                    task.voice_id, 
+        _tts_sem = asyncio.Semaphore(8)
+        completed_count = 0
+
+        async def synthesize_segment(i: int, segment):
+            nonlocal completed_count
+            async with _tts_sem:
+                # 协程版任务创建直接在事件循环上调度，
+                # 不再借用临时 BackgroundTasks 对象当跳板
+                tts_task_id = await create_tts_task(
+                    segment.text,
+                    task.voice_id,
                     tts_params
                 )
-                
-                # 手动启动TTS任务处理
-                await temp_bg_tasks()
-                
-                # 等待TTS任务完成
-                await asyncio.sleep(0.5)  # 等待一会，让TTS任务启动
-                
-                while True:
-                    tts_status = await get_tts_task_status(tts_task_id)
-                    if tts_status and tts_status.status in ["completed", "failed"]:
-                        break
-                    await asyncio.sleep(0.5)
-                
-                if tts_status and tts_status.status == "completed":
-                    # 获取TTS结果
-                    tts_result = await get_tts_task_result(tts_task_id)
-                    
-                    if tts_result:
-                        # 复制TTS生成的音频文件到输出目录
-                        segment_audio_file = os.path.join(audio_dir, f"segment_{i}.wav")
-                        
-                        tts_output_file = tts_result.file_path
-                        shutil.copy2(tts_output_file, segment_audio_file)
-                        
-                        tts_results.append({
-                            "segment_id": i,
-                            "start": segment.start,
-                            "end": segment.end,
-                            "text": segment.text,
-                            "audio_file": segment_audio_file,
-                            "duration": tts_result.duration
-                        })
-                else:
+
+                # 等待TTS完成事件，免去轮询的 0.5 秒粒度延迟
+                await asyncio.wait_for(get_tts_event(tts_task_id).wait(),
+                                       timeout=300.0)
+                tts_status = await get_tts_task_status(tts_task_id)
+
+                if not (tts_status and tts_status.status == "completed"):
                     print(f"TTS任务失败: {tts_task_id}")
                     raise ValueError(f"生成片段 {i} 的语音失败")
-            except Exception as e:
-                print(f"处理片段失败: {e}")
-                raise ValueError(f"处理片段 {i} 失败: {e}")
+
+                # 获取TTS结果
+                tts_result = await get_tts_task_result(tts_task_id)
+                if not tts_result:
+                    raise ValueError(f"生成片段 {i} 的语音失败")
+
+                # 复制TTS生成的音频文件到输出目录
+                segment_audio_file = os.path.join(audio_dir, f"segment_{i}.wav")
+                shutil.copy2(tts_result.file_path, segment_audio_file)
+
+                # 按完成数推进进度（完成次序与提交次序无关）
+                completed_count += 1
+                task.progress = 0.1 + 0.7 * (completed_count / total_segments)
+                task.updated_at = datetime.now()
+                mark_record_dirty(REPLACE_TASKS_FILE, task.task_id, task)
+
+                return {
+                    "segment_id": i,
+                    "start": segment.start,
+                    "end": segment.end,
+                    "text": segment.text,
+                    "audio_file": segment_audio_file,
+                    "duration": tts_result.duration
+                }
+
+        try:
+            tts_results = list(await asyncio.gather(
+                *(synthesize_segment(i, segment)
+                  for i, segment in enumerate(transcription.segments))
+            ))
+        except Exception as e:
+            print(f"处理片段失败: {e}")
+            raise ValueError(f"处理片段失败: {e}")
         
         # 更新进度
-        for i, t in enumerate(REPLACE_TASKS_DB):
-            if t.task_id == task_id:
-                REPLACE_TASKS_DB[i].progress = 0.8
-                REPLACE_TASKS_DB[i].updated_at = datetime.now()
-                break
-        
-        await save_replace_tasks_db()
+        task.progress = 0.8
+        task.updated_at = datetime.now()
+
+        mark_record_dirty(REPLACE_TASKS_FILE, task.task_id, task)
         
         # 生成音频替换记录
         replacement_info = {
@@ -668,33 +837,42 @@ async def process_replace_task(task_id: str):
             
             # 读取所有音频片段
             try:
-                # 创建一个空列表存储所有音频片段
-                combined_audio = []
-                sample_rate = None
-                
                 # 按时间顺序排序片段
                 sorted_results = sorted(tts_results, key=lambda x: x["start"])
-                
-                # 读取并连接所有音频片段
+
+                # 第一遍只读文件头拿到长度和采样率，不解码数据
+                audio_files = [r["audio_file"] for r in sorted_results
+                               if os.path.exists(r["audio_file"])]
                 for result in sorted_results:
-                    audio_file = result["audio_file"]
-                    if os.path.exists(audio_file):
-                        y, sr = librosa.load(audio_file, sr=None)
-                        if sample_rate is None:
-                            sample_rate = sr
-                        elif sr != sample_rate:
-                            # 如果采样率不一致，重新采样
-                            y = librosa.resample(y, orig_sr=sr, target_sr=sample_rate)
-                        
-                        # 添加到合并列表
-                        combined_audio.append(y)
+                    if not os.path.exists(result["audio_file"]):
+                        print(f"音频文件不存在: {result['audio_file']}")
+                infos = [sf.info(p) for p in audio_files]
+
+                if audio_files:
+                    sample_rate = infos[0].samplerate
+                    if all(info.samplerate == sample_rate for info in infos):
+                        # 采样率一致：按总长度预分配一次，逐段读入目标区间，
+                        # 免去 concatenate 的二次拷贝，峰值内存降到 1 倍
+                        total = sum(info.frames for info in infos)
+                        final_audio = np.empty(total, dtype=np.float32)
+                        offset = 0
+                        for path, info in zip(audio_files, infos):
+                            sf.read(path, dtype='float32', always_2d=False,
+                                    out=final_audio[offset:offset + info.frames])
+                            offset += info.frames
                     else:
-                        print(f"音频文件不存在: {audio_file}")
-                
-                if combined_audio and sample_rate:
-                    # 连接所有音频片段
-                    final_audio = np.concatenate(combined_audio)
-                    
+                        # 采样率不一致（少见）：逐段重采样后再连接
+                        combined_audio = []
+                        for path in audio_files:
+                            y, sr = sf.read(path, dtype='float32',
+                                            always_2d=False)
+                            if sr != sample_rate:
+                                y = librosa.resample(y, orig_sr=sr,
+                                                     target_sr=sample_rate,
+                                                     res_type='soxr_hq')
+                            combined_audio.append(y)
+                        final_audio = np.concatenate(combined_audio)
+
                     # 保存为输出文件
                     sf.write(output_path, final_audio, sample_rate)
                 else:
@@ -706,87 +884,82 @@ async def process_replace_task(task_id: str):
                 shutil.copy2(media_file.file_path, output_path)
         
         # 更新任务完成状态
-        for i, t in enumerate(REPLACE_TASKS_DB):
-            if t.task_id == task_id:
-                REPLACE_TASKS_DB[i].status = "completed"
-                REPLACE_TASKS_DB[i].progress = 1.0
-                REPLACE_TASKS_DB[i].updated_at = datetime.now()
-                REPLACE_TASKS_DB[i].file_path = output_path
-                break
-        
-        await save_replace_tasks_db()
+        task.status = "completed"
+        task.progress = 1.0
+        task.updated_at = datetime.now()
+        task.file_path = output_path
+
+        await _persist_record(REPLACE_TASKS_FILE, task, save_replace_tasks_db)
         print(f"替换任务完成: {task_id}, 文件: {output_path}")
-        
+
     except Exception as e:
         # 更新任务状态为失败
-        for i, t in enumerate(REPLACE_TASKS_DB):
-            if t.task_id == task_id:
-                REPLACE_TASKS_DB[i].status = "failed"
-                REPLACE_TASKS_DB[i].error = str(e)
-                REPLACE_TASKS_DB[i].updated_at = datetime.now()
-                break
-        
-        await save_replace_tasks_db()
+        task.status = "failed"
+        task.error = str(e)
+        task.updated_at = datetime.now()
+
+        await _persist_record(REPLACE_TASKS_FILE, task, save_replace_tasks_db)
         print(f"替换任务失败: {task_id}, 错误: {e}")
 
 # 获取任务状态
 async def get_task_status(task_id: str) -> Optional[VoiceReplaceStatus]:
     # 尝试查找转写任务
-    for task in TRANSCRIPTION_TASKS_DB:
-        if task.task_id == task_id:
-            # 查找对应的媒体文件获取时长
-            original_duration = None
-            for mf in MEDIA_FILES_DB:
-                if mf.file_id == task.file_id:
-                    original_duration = mf.duration
-                    break
-            
-            return VoiceReplaceStatus(
-                task_id=task.task_id,
-                name=task.name,
-                status=task.status,
-                task_type="transcribe",
-                progress=task.progress,
-                created_at=task.created_at,
-                updated_at=task.updated_at,
-                original_duration=original_duration,
-                error=task.error
-            )
-    
+    task = TRANSCRIPTION_TASKS_INDEX.get(task_id)
+    if task:
+        # 查找对应的媒体文件获取时长
+        media_file = MEDIA_FILES_INDEX.get(task.file_id)
+        original_duration = media_file.duration if media_file else None
+
+        return VoiceReplaceStatus(
+            task_id=task.task_id,
+            name=task.name,
+            status=task.status,
+            task_type="transcribe",
+            progress=task.progress,
+            created_at=task.created_at,
+            updated_at=task.updated_at,
+            original_duration=original_duration,
+            error=task.error
+        )
+
     # 尝试查找替换任务
-    for task in REPLACE_TASKS_DB:
-        if task.task_id == task_id:
-            return VoiceReplaceStatus(
-                task_id=task.task_id,
-                name=task.name,
-                status=task.status,
-                task_type="replace",
-                progress=task.progress,
-                created_at=task.created_at,
-                updated_at=task.updated_at,
-                output_filename=task.output_filename,
-                error=task.error
-            )
-    
+    task = REPLACE_TASKS_INDEX.get(task_id)
+    if task:
+        return VoiceReplaceStatus(
+            task_id=task.task_id,
+            name=task.name,
+            status=task.status,
+            task_type="replace",
+            progress=task.progress,
+            created_at=task.created_at,
+            updated_at=task.updated_at,
+            output_filename=task.output_filename,
+            error=task.error
+        )
+
     return None
 
 # 获取字幕
 async def get_subtitles(task_id: str, format: str = "srt") -> Optional[SubtitleResponse]:
     # 查找转写任务
-    for task in TRANSCRIPTION_TASKS_DB:
-        if task.task_id == task_id and task.status == "completed" and task.subtitles_path:
-            if format in task.subtitles_path and os.path.exists(task.subtitles_path[format]):
+    task = TRANSCRIPTION_TASKS_INDEX.get(task_id)
+    if task and task.status == "completed" and task.subtitles_path:
+        if format in task.subtitles_path and os.path.exists(task.subtitles_path[format]):
+            # 字幕在任务完成后不可变，优先取内存缓存，缓存未命中才读盘
+            content = _subtitle_cache_get((task_id, format))
+            if content is None:
                 with open(task.subtitles_path[format], "r", encoding="utf-8") as f:
                     content = f.read()
-                
-                return SubtitleResponse(
-                    task_id=task.task_id,
-                    content=content,
-                    format=format,
-                    language=task.transcription.language if task.transcription else "zh-CN",
-                    segments_count=len(task.transcription.segments) if task.transcription else 0
-                )
-    
+                _subtitle_cache_put((task_id, format), content)
+
+            return SubtitleResponse(
+                task_id=task.task_id,
+                content=content,
+                format=format,
+                language=task.transcription.language if task.transcription else "zh-CN",
+                segments_count=len(task.transcription.segments) if task.transcription else 0
+            )
+
     return None
 
 # 获取任务结果
@@ -794,12 +967,12 @@ async def get_task_result(task_id: str) -> Optional[VoiceReplaceStatus]:
     status = await get_task_status(task_id)
     if status and status.status == "completed" and status.task_type == "replace":
         # 找到对应任务获取文件路径
-        for task in REPLACE_TASKS_DB:
-            if task.task_id == task_id:
-                if os.path.exists(task.file_path):
-                    return status
-    
+        task = REPLACE_TASKS_INDEX.get(task_id)
+        if task and os.path.exists(task.file_path):
+            return status
+
     return None
 
-# 初始化服务
-asyncio.create_task(init_replace_service())
\ No newline at end of file
+# 初始化改由 FastAPI startup 事件触发（见 integration.register_startup）：
+# 模块导入时事件循环尚未运行，asyncio.create_task 会直接抛错被吞掉，
+# 导致持久化记录从未加载
\ No newline at end of file
@@ -25,11 +25,29 @@ class VoiceEncoder:
         
         # 检查模型文件是否存在
         self.model = None
+        self.dtype = torch.float32
         if os.path.exists(model_path):
             try:
-                self.model = torch.jit.load(model_path)
-                self.model.to(self.device)
+                # map_location 直接落到目标设备，省去先进内存再搬运的一次拷贝
+                self.model = torch.jit.load(model_path, map_location=self.device)
                 self.model.eval()
+                # GPU 上用半精度推理：显存带宽减半，吞吐近乎翻倍
+                if self.device.type == "cuda":
+                    self.model.half()
+                    self.dtype = torch.float16
+                # 冻结并做推理图优化（常量折叠、算子融合），失败时保持原模块
+                try:
+                    self.model = torch.jit.optimize_for_inference(self.model)
+                except Exception:
+                    pass
+                # 预热一次：TorchScript 的 profiling 执行器在首几次前向时才特化内核，
+                # 用一秒静音把这笔开销挪到启动阶段
+                try:
+                    dummy = torch.zeros(1, 16000, device=self.device, dtype=self.dtype)
+                    with torch.inference_mode():
+                        self.model(dummy)
+                except Exception:
+                    pass
                 print(f"声音编码器模型加载成功: {model_path}")
             except Exception as e:
                 print(f"加载声音编码器模型失败: {e}")
@@ -76,12 +94,13 @@ class VoiceEncoder:
         # 预处理：标准化音频
         y = librosa.util.normalize(y) * 0.95
         
-        # 转换为张量
-        audio_tensor = torch.FloatTensor(y).unsqueeze(0).to(self.device)
+        # 转换为张量，与模型推理精度保持一致
+        audio_tensor = torch.from_numpy(np.ascontiguousarray(y, dtype=np.float32))
+        audio_tensor = audio_tensor.unsqueeze(0).to(self.device, dtype=self.dtype)
         
-        # 使用模型提取特征
-        with torch.no_grad():
-            embedding = self.model(audio_tensor).cpu().numpy()[0]
+        # 使用模型提取特征：inference_mode 连 autograd 记账都跳过，比 no_grad 更轻
+        with torch.inference_mode():
+            embedding = self.model(audio_tensor).float().cpu().numpy()[0]
         
         # 创建特征字典
         features = {
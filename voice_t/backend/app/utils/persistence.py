@@ -0,0 +1,33 @@
+import asyncio
+from typing import Awaitable, Callable
+
+class DebouncedFlusher:
+    """保存去抖协程的公共骨架。
+
+    调用方在数据变更时只调用 mark() 置脏标志，后台协程等到标志被置位后
+    先短暂休眠一个合并窗口，把窗口内的连续更新合并成一次落盘，再执行
+    传入的 flush 回调。脏数据本身（集合、字典或整个任务库）仍由各服务
+    自己维护，回调内负责取走并写盘。
+    """
+
+    def __init__(self, flush: Callable[[], Awaitable[None]], interval: float = 0.5):
+        self._flush = flush
+        self._interval = interval
+        self._dirty = asyncio.Event()
+        self._task = None
+
+    # 标记数据已变更（代替每次更新都立即写文件）
+    def mark(self):
+        self._dirty.set()
+
+    # 启动后台去抖协程，重复调用只启动一次
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._dirty.wait()
+            self._dirty.clear()
+            await asyncio.sleep(self._interval)
+            await self._flush()
@@ -17,6 +17,7 @@ setup(
         "python-jose[cryptography]>=3.3.0",
         "passlib[bcrypt]>=1.7.4",
         "python-dotenv>=1.0.1",
+        "orjson>=3.9.0",
         "numpy>=1.26.4",
         "pandas>=2.2.0",
         "scikit-learn>=1.4.0",